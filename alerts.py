@@ -0,0 +1,243 @@
+import json
+import math
+import socket
+import threading
+import time
+import urllib.request
+
+import config
+
+APP_NAME = "Baret Takip Sistemi"
+
+
+class AlertDigest:
+    #bir kanalin bekleme suresi icinde ayni kameradan gelen ihlaller tek mesajda toplanir; sayi hic kaybolmaz
+    def __init__(self, camera_id, timestamp, track_id=None, image_path=None):
+        self.camera_id = camera_id
+        self.count = 0
+        self.first_at = timestamp
+        self.last_at = timestamp
+        self.track_ids = []
+        self.image_path = image_path
+        self.add(timestamp, track_id, image_path)
+
+    def add(self, timestamp, track_id=None, image_path=None):
+        self.count += 1
+        self.first_at = min(self.first_at, timestamp)
+        self.last_at = max(self.last_at, timestamp)
+        if track_id is not None and len(self.track_ids) < config.ALERT_DIGEST_MAX_TRACK_IDS:
+            self.track_ids.append(track_id)
+        if image_path:
+            self.image_path = image_path
+
+    def title(self):
+        return "Baret İhlali Tespit Edildi!" if self.count == 1 else "Baret İhlalleri Tespit Edildi!"
+
+    def message(self):
+        if self.count == 1:
+            message = f"Saat {self.last_at.strftime('%H:%M:%S')} itibarıyla bir ihlal kaydedildi."
+        else:
+            span = max(1, math.ceil((self.last_at - self.first_at).total_seconds()))
+            message = (f"Son {span} sn içinde {self.count} ihlal kaydedildi "
+                       f"({self.first_at.strftime('%H:%M:%S')} - {self.last_at.strftime('%H:%M:%S')}).")
+        if self.camera_id is not None:
+            message = f"Kamera {self.camera_id}: {message}"
+        return message
+
+    def to_dict(self):
+        return {
+            "title": self.title(),
+            "message": self.message(),
+            "camera_id": self.camera_id,
+            "count": self.count,
+            "first_at": self.first_at.isoformat(),
+            "last_at": self.last_at.isoformat(),
+            "track_ids": self.track_ids,
+            "image_path": self.image_path,
+        }
+
+
+class DesktopSink:
+    name = "desktop"
+
+    def __init__(self, interval=config.ALERT_DESKTOP_INTERVAL_SECONDS, retries=0):
+        self.interval = interval
+        self.retries = retries
+
+    def send(self, digest):
+        from plyer import notification
+
+        notification.notify(title=digest.title(), message=digest.message(), app_name=APP_NAME, timeout=10)
+
+
+class ConsoleSink:
+    name = "console"
+
+    def __init__(self, interval=0.0, retries=0):
+        self.interval = interval
+        self.retries = retries
+
+    def send(self, digest):
+        print(f"[{digest.title()}] {digest.message()}")
+
+
+class WebhookSink:
+    name = "webhook"
+
+    def __init__(self, url, interval=config.ALERT_WEBHOOK_INTERVAL_SECONDS, retries=config.ALERT_RETRY_ATTEMPTS,
+                 timeout=config.ALERT_WEBHOOK_TIMEOUT_SECONDS):
+        self.url = url
+        self.interval = interval
+        self.retries = retries
+        self.timeout = timeout
+
+    def send(self, digest):
+        body = json.dumps(digest.to_dict(), ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class FileSink:
+    #her uyari JSON satiri olarak eklenir; baska araclar dosyayi takip edebilir
+    name = "file"
+
+    def __init__(self, path, interval=config.ALERT_FILE_INTERVAL_SECONDS, retries=config.ALERT_RETRY_ATTEMPTS):
+        self.path = path
+        self.interval = interval
+        self.retries = retries
+
+    def send(self, digest):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(digest.to_dict(), ensure_ascii=False) + "\n")
+
+
+class SocketSink:
+    #yerel dinleyiciye UDP ile JSON; baglanti kurulmadigi icin alici kapaliyken de beklemez
+    name = "socket"
+
+    def __init__(self, address, interval=config.ALERT_SOCKET_INTERVAL_SECONDS, retries=config.ALERT_RETRY_ATTEMPTS):
+        self.address = tuple(address)
+        self.interval = interval
+        self.retries = retries
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, digest):
+        self.sock.sendto(json.dumps(digest.to_dict(), ensure_ascii=False).encode("utf-8"), self.address)
+
+
+class SinkWorker:
+    #her kanal kendi thread'inde calisir; yavas ya da erisilemeyen bir kanal digerlerini ve tespiti bekletmez
+    def __init__(self, sink, retry_backoff=config.ALERT_RETRY_BACKOFF_SECONDS):
+        self.sink = sink
+        self.retry_backoff = retry_backoff
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.next_send_at = 0.0
+        self.stopping = False
+        self.thread = None
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.aggregated = 0
+
+    def start(self):
+        self.stopping = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=2):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+        self.thread = None
+
+    def add(self, camera_id, timestamp, track_id=None, image_path=None):
+        with self.condition:
+            digest = self.pending.get(camera_id)
+            if digest is None:
+                self.pending[camera_id] = AlertDigest(camera_id, timestamp, track_id, image_path)
+            else:
+                digest.add(timestamp, track_id, image_path)
+                self.aggregated += 1
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.stopping:
+                    delay = self.next_send_at - time.monotonic()
+                    if self.pending and delay <= 0:
+                        break
+                    self.condition.wait(timeout=delay if self.pending else None)
+                if self.stopping and not self.pending:
+                    return
+                batch, self.pending = self.pending, {}
+                stopping = self.stopping
+            for digest in batch.values():
+                self.deliver(digest, retries=0 if stopping else self.sink.retries)
+            self.next_send_at = time.monotonic() + self.sink.interval
+            if stopping:
+                return
+
+    def deliver(self, digest, retries):
+        for attempt in range(retries + 1):
+            try:
+                self.sink.send(digest)
+                self.sent += 1
+                return True
+            except Exception as e:
+                if attempt == retries:
+                    print(f"Uyarı gönderilemedi ({self.sink.name}): {e}")
+                    self.failed += 1
+                    return False
+                self.retried += 1
+                #kapanis istenirse yeniden deneme beklemesi kesilir
+                with self.condition:
+                    if self.stopping or self.condition.wait_for(lambda: self.stopping, timeout=self.retry_backoff * 2 ** attempt):
+                        self.failed += 1
+                        return False
+
+    def stats(self):
+        with self.condition:
+            pending = sum(digest.count for digest in self.pending.values())
+        return {"sent": self.sent, "failed": self.failed, "retried": self.retried, "aggregated": self.aggregated, "pending": pending}
+
+
+def build_sinks(desktop=config.ALERT_DESKTOP_ENABLED, console=False, webhook_url=config.ALERT_WEBHOOK_URL,
+                file_path=config.ALERT_FILE_PATH, socket_address=config.ALERT_SOCKET_ADDRESS):
+    sinks = []
+    if desktop:
+        sinks.append(DesktopSink())
+    if console:
+        sinks.append(ConsoleSink())
+    if webhook_url:
+        sinks.append(WebhookSink(webhook_url))
+    if file_path:
+        sinks.append(FileSink(file_path))
+    if socket_address:
+        sinks.append(SocketSink(socket_address))
+    return sinks
+
+
+class AlertDispatcher:
+    #publish sadece kanal kuyruklarina ekler ve hemen doner; gonderim, hiz siniri ve yeniden deneme kanal thread'lerindedir
+    def __init__(self, sinks):
+        self.workers = [SinkWorker(sink) for sink in sinks]
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self, timeout=2):
+        for worker in self.workers:
+            worker.stop(timeout)
+
+    def publish(self, event, image_path=None):
+        for worker in self.workers:
+            worker.add(event.camera_id, event.timestamp, event.track_id, image_path)
+
+    def stats(self):
+        return {worker.sink.name: worker.stats() for worker in self.workers}
@@ -0,0 +1,225 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+import config
+from frame_buffer import render_snapshot
+from settings import Setting
+from zone_index import CooldownZoneIndex
+from track_state import ViolationTracks
+
+REPORT_FIELDS = ["file", "frame", "video_time", "video_timestamp", "track_id", "confidence", "x1", "y1", "x2", "y2", "image_path"]
+
+worker_model = None
+
+
+def collect_video_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.lower().endswith(config.VIDEO_EXTENSIONS))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"Uyarı: Dosya bulunamadı: {path}")
+    return sorted(files)
+
+
+def format_video_time(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
+
+
+class FileAnalysis:
+    #VideoProcessor'a uygulama yerine verilir; ihlaller diske degil rapora yazilir
+    def __init__(self, model, path, confidence, show_boxes=True, image_dir=None):
+        self.model = model
+        self.path = path
+        self.image_dir = image_dir
+        self.confidence_var = Setting(confidence)
+        self.show_boxes_var = Setting(show_boxes)
+        self.violation_tracks = ViolationTracks()
+        self.recent_log_zones = CooldownZoneIndex()
+        self.violation_writer = self
+        self.clip_recorder = None
+        self.violations = []
+        self.fps = config.TRACKER_FRAME_RATE
+
+    def submit(self, event):
+        #kaydedilen kare izin en iyi karesidir; kare numarasi onun video zamanindan bulunur
+        video_time = event.observed_at
+        frame_index = round(video_time * self.fps)
+        image_path = ""
+        if self.image_dir:
+            stem = os.path.splitext(os.path.basename(self.path))[0]
+            image_path = os.path.join(self.image_dir, f"{stem}_{frame_index:07d}_{event.track_id}.jpg")
+            cv2.imwrite(image_path, render_snapshot(event.frame, event.overlay), [cv2.IMWRITE_JPEG_QUALITY, config.VIOLATION_JPEG_QUALITY])
+
+        x1, y1, x2, y2 = event.box
+        self.violations.append({
+            "file": self.path,
+            "frame": frame_index,
+            "video_time": round(video_time, 3),
+            "video_timestamp": format_video_time(video_time),
+            "track_id": event.track_id,
+            "confidence": round(event.confidence, 4),
+            "x1": x1, "y1": y1, "x2": x2, "y2": y2,
+            "image_path": image_path,
+        })
+        return True
+
+
+def analyze_file(model, path, stride=config.BATCH_FRAME_STRIDE, batch_size=config.BATCH_INFERENCE_SIZE,
+                 confidence=config.DEFAULT_CONFIDENCE, tracker_config=config.TRACKER_CONFIG, image_dir=None):
+    from stream_engine import create_tracker
+    from video_processor import VideoProcessor
+    from inference_workers import EMPTY_TRACKS
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Video açılamadı: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    fps = fps if fps > 0 else config.TRACKER_FRAME_RATE
+
+    tracker = create_tracker(tracker_config, frame_rate=max(1, round(fps / stride)))
+    analysis = FileAnalysis(model, path, confidence, image_dir=image_dir)
+    analysis.fps = fps
+    processor = VideoProcessor(analysis, camera_id=os.path.basename(path))
+
+    def process_batch(batch):
+        results = model.predict([frame for _, frame in batch], conf=config.TRACKER_MIN_CONFIDENCE, verbose=False)
+        for (frame_index, frame), result in zip(batch, results):
+            det = result.boxes.cpu().numpy()
+            tracks = tracker.update(det, frame) if len(det) else EMPTY_TRACKS
+            #bos karelerde de cagrilir: kaybolan izler video zamanina gore kapanir
+            processor.process_detections(frame, tracks[:, :4], tracks[:, 4], tracks[:, 5], tracks[:, 6], now=frame_index / fps)
+
+    start_time = time.perf_counter()
+    frame_index = 0
+    frames_analyzed = 0
+    batch = []
+    try:
+        while True:
+            if frame_index % stride:
+                #atlanan kareler cozulmeden gecilir
+                if not cap.grab():
+                    break
+                frame_index += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            batch.append((frame_index, frame))
+            frame_index += 1
+            frames_analyzed += 1
+            if len(batch) == batch_size:
+                process_batch(batch)
+                batch = []
+        if batch:
+            process_batch(batch)
+        processor.finish_tracks(now=frame_index / fps)
+    finally:
+        cap.release()
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "file": path,
+        "frames": frame_index,
+        "frames_analyzed": frames_analyzed,
+        "duration": frame_index / fps,
+        "elapsed": elapsed,
+        "violations": analysis.violations,
+    }
+
+
+def init_worker(model_path, backend, int8, threads):
+    global worker_model
+    from inference_backends import load_inference_model
+    worker_model = load_inference_model(model_path, backend, int8, threads)
+
+
+def analyze_file_in_worker(path, options):
+    return analyze_file(worker_model, path, **options)
+
+
+def analyze_files(files, model_path=config.MODEL_PATH, workers=config.BATCH_NUM_WORKERS, backend=config.INFERENCE_BACKEND,
+                  int8=config.INFERENCE_INT8, threads=config.INFERENCE_THREADS, **options):
+    from inference_backends import export_model, load_inference_model
+
+    if workers > 1 and len(files) > 1:
+        #dosya donusumu her islemde tekrar yapilmasin diye once burada yapilir
+        export_model(model_path, backend, int8)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(model_path, backend, int8, threads)) as executor:
+            futures = [executor.submit(analyze_file_in_worker, path, options) for path in files]
+            return [future.result() for future in futures]
+
+    model = load_inference_model(model_path, backend, int8, threads)
+    return [analyze_file(model, path, **options) for path in files]
+
+
+def write_report(results, report_path):
+    violations = [violation for result in results for violation in result["violations"]]
+    if report_path.lower().endswith(".json"):
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    else:
+        with open(report_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(violations)
+    return len(violations)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kayıtlı videoları en yüksek hızda toplu olarak analiz eder.")
+    parser.add_argument("paths", nargs="+", help="Video dosyaları veya klasörler")
+    parser.add_argument("--model", default=config.MODEL_PATH)
+    parser.add_argument("--confidence", type=float, default=config.DEFAULT_CONFIDENCE)
+    parser.add_argument("--tracker", default=config.TRACKER_CONFIG)
+    parser.add_argument("--backend", choices=("pytorch", "onnx", "openvino"), default=config.INFERENCE_BACKEND)
+    parser.add_argument("--int8", action="store_true", default=config.INFERENCE_INT8)
+    parser.add_argument("--threads", type=int, default=config.INFERENCE_THREADS, help="İşlem başına çıkarım thread sayısı")
+    parser.add_argument("--stride", type=int, default=config.BATCH_FRAME_STRIDE, help="Her N. kareyi analiz et")
+    parser.add_argument("--batch-size", type=int, default=config.BATCH_INFERENCE_SIZE)
+    parser.add_argument("--workers", type=int, default=config.BATCH_NUM_WORKERS, help="Dosyaları paylaşacak işlem sayısı")
+    parser.add_argument("--report", default="violations_report.csv", help="Rapor dosyası (.csv veya .json)")
+    parser.add_argument("--save-images", metavar="DIR", help="İhlal görüntülerini bu klasöre kaydet")
+    args = parser.parse_args(argv)
+
+    files = collect_video_files(args.paths)
+    if not files:
+        print("Hata: Analiz edilecek video bulunamadı.")
+        return 1
+    if args.save_images:
+        os.makedirs(args.save_images, exist_ok=True)
+
+    results = analyze_files(
+        files,
+        model_path=args.model,
+        workers=args.workers,
+        backend=args.backend,
+        int8=args.int8,
+        threads=args.threads,
+        stride=max(1, args.stride),
+        batch_size=max(1, args.batch_size),
+        confidence=args.confidence,
+        tracker_config=args.tracker,
+        image_dir=args.save_images,
+    )
+    for result in results:
+        speed = result["frames"] / result["elapsed"] if result["elapsed"] > 0 else 0.0
+        print(f"{result['file']}: {len(result['violations'])} ihlal, {result['frames_analyzed']}/{result['frames']} kare, {speed:.1f} kare/sn")
+    total = write_report(results, args.report)
+    print(f"Toplam {total} ihlal raporlandı: {args.report}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+import time
+
+import numpy as np
+
+import config
+
+
+class FakeTensor:
+    #ultralytics tensor arayuzunun benchmark icin gereken kismi
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+    def int(self):
+        return FakeTensor(self.array.astype(np.int32))
+
+    def tolist(self):
+        return self.array.tolist()
+
+    def __len__(self):
+        return len(self.array)
+
+
+class FakeBoxes:
+    def __init__(self, data, with_ids):
+        self.array = data
+        self.data = FakeTensor(data)
+        self.xyxy = FakeTensor(data[:, :4])
+        self.id = FakeTensor(data[:, 4]) if with_ids and len(data) else None
+        self.conf = FakeTensor(data[:, 5])
+        self.cls = FakeTensor(data[:, 6])
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        #predict ciktisi: x1, y1, x2, y2, conf, cls
+        return self.array[:, [0, 1, 2, 3, 5, 6]]
+
+    def __len__(self):
+        return len(self.array)
+
+
+class FakeResult:
+    def __init__(self, boxes, orig_img):
+        self.boxes = boxes
+        self.orig_img = orig_img
+
+
+class FakeDetector:
+    #GPU veya model dosyasi olmadan sabit sayida, yavasca hareket eden kutular ureten detector
+    def __init__(self, boxes_per_frame=8, violation_ratio=0.25, latency_ms=0.0, id_churn=0.0, seed=0):
+        self.names = {config.VIOLATION_CLASS_ID: "head", config.HELMET_CLASS_ID: "helmet", 2: "person"}
+        self.boxes_per_frame = boxes_per_frame
+        self.violation_ratio = violation_ratio
+        self.latency = latency_ms / 1000.0
+        self.id_churn = id_churn
+        self.rng = np.random.default_rng(seed)
+        self.positions = self.rng.uniform(0, 1, size=(boxes_per_frame, 2))
+        self.velocities = self.rng.uniform(-0.005, 0.005, size=(boxes_per_frame, 2))
+        self.track_ids = np.arange(1, boxes_per_frame + 1)
+        self.next_id = boxes_per_frame + 1
+        self.classes = np.where(self.rng.uniform(size=boxes_per_frame) < violation_ratio, config.VIOLATION_CLASS_ID, config.HELMET_CLASS_ID)
+
+    def step(self, image):
+        h, w = image.shape[:2]
+        self.positions = (self.positions + self.velocities) % 1.0
+        if self.id_churn:
+            churned = self.rng.uniform(size=self.boxes_per_frame) < self.id_churn
+            new_ids = np.arange(self.next_id, self.next_id + churned.sum())
+            self.track_ids[churned] = new_ids
+            self.next_id += len(new_ids)
+
+        size = 0.08
+        data = np.zeros((self.boxes_per_frame, 7), dtype=np.float32)
+        data[:, 0] = self.positions[:, 0] * w * (1 - size)
+        data[:, 1] = self.positions[:, 1] * h * (1 - size)
+        data[:, 2] = data[:, 0] + w * size
+        data[:, 3] = data[:, 1] + h * size
+        data[:, 4] = self.track_ids
+        data[:, 5] = self.rng.uniform(0.5, 0.95, size=self.boxes_per_frame)
+        data[:, 6] = self.classes
+        if self.latency:
+            time.sleep(self.latency)
+        return data
+
+    def track(self, image, persist=True, verbose=False, **kwargs):
+        return [FakeResult(FakeBoxes(self.step(image), with_ids=True), image)]
+
+    def predict(self, images, verbose=False, **kwargs):
+        if not isinstance(images, list):
+            images = [images]
+        return [FakeResult(FakeBoxes(self.step(image), with_ids=False), image) for image in images]
+
+
+def make_synthetic_video(path, frames=300, width=1280, height=720, fps=30):
+    import cv2
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    for i in range(frames):
+        frame = np.roll(background, i * 4, axis=1)
+        writer.write(frame)
+    writer.release()
+    return path
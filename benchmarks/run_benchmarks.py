@@ -0,0 +1,358 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from queue import Queue
+
+import cv2
+import numpy as np
+
+import config
+from benchmarks.fake_detector import FakeDetector, make_synthetic_video
+from capture import CaptureSource
+from display_renderer import DisplayRenderer
+from settings import Setting
+from video_processor import VideoProcessor, build_overlay, EMPTY_DETECTIONS
+from scheduler import InferenceScheduler
+from motion_gate import MotionGate
+from violation_store import ViolationStore
+from violation_writer import ViolationEvent, ViolationWriter, OVERFLOW_BLOCK
+from zone_index import CooldownZoneIndex
+from track_state import ViolationTracks
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#metrik yonu: hangi degisim regresyon sayilir
+HIGHER_IS_BETTER = ("fps", "per_second")
+LOWER_IS_BETTER = ("_ms",)
+
+
+def latency_summary(samples):
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    values = np.asarray(samples) * 1000
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+    }
+
+
+class NullWriter:
+    def __init__(self):
+        self.events = 0
+
+    def submit(self, event):
+        self.events += 1
+        return True
+
+
+class BenchApp:
+    #VideoProcessor'in bekledigi uygulama arayuzu, Tk olmadan
+    def __init__(self, model, violation_writer):
+        self.model = model
+        self.violation_writer = violation_writer
+        self.clip_recorder = None
+        self.inference_pool = None
+        self.model_ready = threading.Event()
+        self.model_ready.set()
+        self.capture = None
+        self.stop_event = threading.Event()
+        self.results_lock = threading.Lock()
+        self.log_queue = Queue()
+        self.confidence_var = Setting(config.DEFAULT_CONFIDENCE)
+        self.show_boxes_var = Setting(True)
+        self.violation_tracks = ViolationTracks()
+        self.recent_log_zones = CooldownZoneIndex()
+        self.results = EMPTY_DETECTIONS
+        self.processed_seqs = set()
+        self.latencies = []
+
+    @property
+    def latest_results_for_drawing(self):
+        return self.results
+
+    @latest_results_for_drawing.setter
+    def latest_results_for_drawing(self, value):
+        self.results = value
+        frame = self.model.last_frame
+        if frame is not None and frame.seq not in self.processed_seqs:
+            self.processed_seqs.add(frame.seq)
+            self.latencies.append(time.time() - frame.captured_at)
+
+
+class RingAwareDetector(FakeDetector):
+    #islenen karenin yakalanma zamanini bulmak icin ring'e bakar
+    def __init__(self, app_ref, **kwargs):
+        super().__init__(**kwargs)
+        self.app_ref = app_ref
+        self.last_frame = None
+
+    def track(self, image, **kwargs):
+        capture = self.app_ref().capture
+        self.last_frame = next((f for f in list(capture.ring.frames) if f.image is image), None) if capture else None
+        return super().track(image, **kwargs)
+
+
+def bench_postprocess(frames=2000, boxes_per_frame=16):
+    detector = FakeDetector(boxes_per_frame=boxes_per_frame, id_churn=0.01)
+    writer = NullWriter()
+    app = BenchApp(detector, writer)
+    processor = VideoProcessor(app)
+    image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    samples = []
+    #iz durumlari zamana bagli oldugundan kareler 30 FPS'lik sanal saatle islenir
+    for i in range(frames):
+        boxes = detector.track(image)[0].boxes
+        start = time.perf_counter()
+        processor.process_detections(image, boxes.xyxy.numpy(), boxes.id.int().numpy(), boxes.conf.numpy(), boxes.cls.numpy(),
+                                     now=i / 30.0)
+        samples.append(time.perf_counter() - start)
+    processor.finish_tracks(now=frames / 30.0)
+    total = sum(samples)
+    return {"fps": frames / total if total else 0.0, "violations": writer.events, **latency_summary(samples)}
+
+
+def bench_pipeline(video_path, detector_latency_ms=5.0, boxes_per_frame=8):
+    work_dir = tempfile.mkdtemp(prefix="hardhat_bench_")
+    try:
+        store = ViolationStore(os.path.join(work_dir, "bench.db"))
+        writer = ViolationWriter(store, image_dir=os.path.join(work_dir, "violations"))
+        writer.start()
+        app = None
+        detector = RingAwareDetector(lambda: app, boxes_per_frame=boxes_per_frame, latency_ms=detector_latency_ms)
+        app = BenchApp(detector, writer)
+        app.capture = CaptureSource(video_path, live=False, paced=False)
+
+        processor = VideoProcessor(app)
+        #ham verim olculur: hedef FPS, uyarlamali boyut ve hareket kapisi kapali
+        processor.scheduler = InferenceScheduler(target_fps=0, adaptive=False, motion_gate=False)
+        thread = threading.Thread(target=processor.run, daemon=True)
+        start = time.perf_counter()
+        app.capture.start()
+        thread.start()
+        while not app.capture.is_finished():
+            time.sleep(0.01)
+        time.sleep(detector_latency_ms / 1000.0 * 2 + 0.05)
+        app.stop_event.set()
+        thread.join(timeout=2)
+        elapsed = time.perf_counter() - start
+        capture_stats = app.capture.stats()
+        app.capture.stop()
+        writer.close()
+        store.close()
+        return {
+            "fps": len(app.processed_seqs) / elapsed if elapsed else 0.0,
+            "frames_captured": capture_stats["frames_captured"],
+            "frames_processed": len(app.processed_seqs),
+            "frames_dropped": capture_stats["frames_dropped"],
+            **latency_summary(app.latencies),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_display(frames=300, target_size=(960, 540)):
+    #PhotoImage guncellemesi Tk gerektirdigi icin olculmez; olcekleme, renk donusumu, cizim ve PIL sarmalama olculur
+    detector = FakeDetector(boxes_per_frame=8)
+    processor = VideoProcessor(BenchApp(detector, NullWriter()))
+    renderer = DisplayRenderer()
+    renderer.resize(*target_size)
+    image = np.random.default_rng(0).integers(0, 255, size=(1080, 1920, 3), dtype=np.uint8)
+    samples = []
+    for _ in range(frames):
+        boxes = detector.track(image)[0].boxes
+        records = processor.process_detections(image, boxes.xyxy.numpy(), boxes.id.int().numpy(), boxes.conf.numpy(), boxes.cls.numpy())
+        start = time.perf_counter()
+        renderer.convert(image, build_overlay(records, detector.names))
+        samples.append(time.perf_counter() - start)
+    total = sum(samples)
+    return {"fps": frames / total if total else 0.0, **latency_summary(samples)}
+
+
+def bench_motion_gate(static_frames=300, moving_frames=60, size=(1080, 1920)):
+    #durgun sahnede atlanan kare orani ve hareket basladiginda kacirilan kare sayisi
+    gate = MotionGate(keyframe_interval=float("inf"))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, size=(*size, 3), dtype=np.uint8)
+    samples = []
+    inferred = 0
+    for i in range(static_frames):
+        noise = rng.integers(-3, 4, size=(*size, 1), dtype=np.int16)
+        frame = np.clip(background + noise, 0, 255).astype(np.uint8)
+        start = time.perf_counter()
+        should_infer = gate.should_infer(frame, now=i / 30)
+        samples.append(time.perf_counter() - start)
+        if should_infer:
+            inferred += 1
+        gate.update(0)
+
+    missed = 0
+    for i in range(moving_frames):
+        frame = background.copy()
+        x = 200 + i * 20
+        cv2.rectangle(frame, (x, 400), (x + 120, 700), (255, 255, 255), -1)
+        if not gate.should_infer(frame, now=(static_frames + i) / 30):
+            missed += 1
+        gate.update(1)
+    return {"gated_ratio": 1 - inferred / static_frames, "missed_motion_frames": missed, **latency_summary(samples)}
+
+
+def bench_writer(events=200):
+    work_dir = tempfile.mkdtemp(prefix="hardhat_bench_")
+    try:
+        store = ViolationStore(os.path.join(work_dir, "bench.db"))
+        writer = ViolationWriter(store, image_dir=os.path.join(work_dir, "violations"), overflow_policy=OVERFLOW_BLOCK)
+        writer.start()
+        image = np.random.default_rng(0).integers(0, 255, size=(1080, 1920, 3), dtype=np.uint8)
+        start = time.perf_counter()
+        for i in range(events):
+            box = [100, 100, 300, 300]
+            writer.submit(ViolationEvent(datetime.datetime.now(), "bench", i, box, 0.9, image, [(box, f"ID:{i} | IHLAL", (0, 0, 255))]))
+        writer.close(timeout=60)
+        elapsed = time.perf_counter() - start
+        stats = writer.stats()
+        store.close()
+        return {
+            "violations_per_second": stats["written"] / elapsed if elapsed else 0.0,
+            "written": stats["written"],
+            "avg_write_latency_ms": stats["avg_write_latency_ms"],
+            "max_write_latency_ms": stats["max_write_latency_ms"],
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_startup(history_sizes=(1000, 10000, 100000)):
+    results = {}
+    for size in history_sizes:
+        work_dir = tempfile.mkdtemp(prefix="hardhat_bench_")
+        try:
+            db_path = os.path.join(work_dir, "bench.db")
+            store = ViolationStore(db_path)
+            base = datetime.datetime(2025, 1, 1)
+            store.add_many((base + datetime.timedelta(seconds=i * 30), "bench", i, (0, 0, 10, 10), 0.9, f"img_{i}.jpg", None, 0) for i in range(size))
+            store.close()
+
+            #uygulamanin acilista yaptigi is: veritabanini ac, kayit sayisi ve ilk sayfa
+            start = time.perf_counter()
+            store = ViolationStore(db_path)
+            store.count()
+            store.query(limit=50)
+            cutoff = base + datetime.timedelta(seconds=size * 30) - datetime.timedelta(days=7)
+            store.count(since=cutoff)
+            store.query(since=cutoff, limit=50)
+            elapsed = time.perf_counter() - start
+            store.close()
+            results[f"history_{size}_ms"] = elapsed * 1000
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    #yeni bir surecte motor modullerinin import suresi; agir kutuphaneler ilk kullanima kadar yuklenmemeli
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import stream_engine"], cwd=REPO_DIR, check=True)
+    results["engine_import_ms"] = (time.perf_counter() - start) * 1000
+    return results
+
+
+def metric_direction(name):
+    if any(name.endswith(suffix) or suffix in name for suffix in HIGHER_IS_BETTER):
+        return 1
+    if any(name.endswith(suffix) for suffix in LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare_results(current, previous, tolerance):
+    regressions = []
+    for bench, metrics in current["results"].items():
+        old_metrics = previous.get("results", {}).get(bench, {})
+        for name, value in metrics.items():
+            old_value = old_metrics.get(name)
+            direction = metric_direction(name)
+            if not direction or not old_value:
+                continue
+            change = (value - old_value) / old_value
+            marker = ""
+            if change * direction < -tolerance:
+                marker = "  <-- REGRESYON"
+                regressions.append(f"{bench}.{name}")
+            print(f"{bench}.{name}: {old_value:.3f} -> {value:.3f} ({change:+.1%}){marker}")
+    return regressions
+
+
+BENCHMARKS = ("postprocess", "pipeline", "display", "motion_gate", "writer", "startup")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tespit hattı için GPU ve kamera gerektirmeyen benchmark seti")
+    parser.add_argument("--only", help=f"Virgülle ayrılmış benchmark listesi ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--video", help="Kayıtlı bir klip; verilmezse sentetik video üretilir")
+    parser.add_argument("--frames", type=int, default=300, help="Sentetik video kare sayısı")
+    parser.add_argument("--detector-latency-ms", type=float, default=5.0, help="Sahte modelin kare başına gecikmesi")
+    parser.add_argument("--boxes", type=int, default=8, help="Kare başına sahte tespit sayısı")
+    parser.add_argument("--output", help="Sonuç dosyası (varsayılan: benchmarks/results/<zaman>.json)")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Regresyon sayılacak göreli kötüleşme")
+    args = parser.parse_args(argv)
+
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    results = {}
+    temp_dir = None
+    try:
+        if "postprocess" in selected:
+            results["postprocess"] = bench_postprocess(boxes_per_frame=args.boxes * 2)
+        if "pipeline" in selected:
+            video_path = args.video
+            if not video_path:
+                temp_dir = tempfile.mkdtemp(prefix="hardhat_bench_")
+                video_path = make_synthetic_video(os.path.join(temp_dir, "synthetic.avi"), frames=args.frames)
+            results["pipeline"] = bench_pipeline(video_path, args.detector_latency_ms, args.boxes)
+        if "display" in selected:
+            results["display"] = bench_display()
+        if "motion_gate" in selected:
+            results["motion_gate"] = bench_motion_gate()
+        if "writer" in selected:
+            results["writer"] = bench_writer()
+        if "startup" in selected:
+            results["startup"] = bench_startup()
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "opencv": cv2.__version__,
+        "results": results,
+    }
+    for bench, metrics in results.items():
+        print(f"[{bench}] " + ", ".join(f"{name}={value:.2f}" if isinstance(value, float) else f"{name}={value}" for name, value in metrics.items()))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Sonuçlar kaydedildi: {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        regressions = compare_results(report, previous, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metrikte regresyon: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
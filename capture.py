@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+import config
+from frame_buffer import Frame, freeze_image
+from metrics import METRICS
+
+
+def is_live_source(source):
+    #sadece kamera indeksi ve semali adresler (rtsp://, http://) canlidir; yanlis yazilmis bir dosya yolu
+    #canli kaynak sanilip sonsuza kadar yeniden baglanilmaz, acilamaz ve hata verir
+    if isinstance(source, int):
+        return True
+    scheme, separator, _ = str(source).partition("://")
+    return bool(separator) and scheme.isalpha() and scheme.lower() != "file"
+
+
+def open_video_capture(source):
+    if isinstance(source, int):
+        return cv2.VideoCapture(source, cv2.CAP_DSHOW)
+    return cv2.VideoCapture(source)
+
+
+class FrameRing:
+    #sinirli boyutlu son-kare halkasi; dolunca en eski kare atilir
+    def __init__(self, capacity=config.CAPTURE_RING_SIZE):
+        self.frames = deque(maxlen=capacity)
+        self.condition = threading.Condition()
+        self.next_seq = 0
+        self.last_read_seq = -1
+        self.frames_dropped = 0
+
+    def put(self, image, captured_at, pts=None):
+        with self.condition:
+            if len(self.frames) == self.frames.maxlen and self.frames[0].seq > self.last_read_seq:
+                self.frames_dropped += 1
+            frame = Frame(self.next_seq, freeze_image(image), captured_at, pts)
+            self.frames.append(frame)
+            self.next_seq += 1
+            self.condition.notify_all()
+            return frame
+
+    def latest(self, after_seq=-1, consume=True):
+        #consume=False: yan okuyucular (klip kaydi gibi) atilan kare sayacini etkilemez
+        with self.condition:
+            if not self.frames or self.frames[-1].seq <= after_seq:
+                return None
+            frame = self.frames[-1]
+            if consume:
+                self.last_read_seq = max(self.last_read_seq, frame.seq)
+            return frame
+
+    def wait_latest(self, after_seq=-1, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: self.frames and self.frames[-1].seq > after_seq, timeout)
+        return self.latest(after_seq)
+
+    def clear(self):
+        with self.condition:
+            self.frames.clear()
+
+
+class CaptureSource:
+    #her kaynak kendi thread'inde okunur; canli kaynaklarda eski kareler atilir, dosyalar PTS'e gore oynatilir
+    def __init__(self, source, ring_size=config.CAPTURE_RING_SIZE, live=None, paced=None, name=None):
+        self.source = source
+        self.name = name
+        self.is_live = is_live_source(source) if live is None else live
+        self.paced = not self.is_live if paced is None else paced
+        self.ring = FrameRing(ring_size)
+        self.cap = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.finished_event = threading.Event()
+
+        self.fps = 0.0
+        self.frames_captured = 0
+        self.reconnects = 0
+        self.last_capture_time = None
+
+    def open(self):
+        self.cap = open_video_capture(self.source)
+        if not self.cap.isOpened():
+            self.cap.release()
+            self.cap = None
+            return False
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps > 0 else 0.0
+        return True
+
+    def start(self):
+        if not self.open():
+            return False
+        self.stop_event.clear()
+        self.finished_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1)
+        self.thread = None
+        self.release()
+        self.ring.clear()
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+        self.cap = None
+
+    def is_finished(self):
+        return self.finished_event.is_set()
+
+    def reconnect(self):
+        delay = config.CAPTURE_RECONNECT_INITIAL_DELAY
+        while not self.stop_event.is_set():
+            self.release()
+            print(f"Kaynak bağlantısı koptu, {delay:.0f} sn sonra yeniden bağlanılacak: {self.source}")
+            if self.stop_event.wait(delay):
+                return False
+            self.reconnects += 1
+            if self.open():
+                return True
+            delay = min(delay * 2, config.CAPTURE_RECONNECT_MAX_DELAY)
+        return False
+
+    def run(self):
+        start_wall = None
+        start_pts = None
+        try:
+            while not self.stop_event.is_set():
+                with METRICS.stage("decode", self.name):
+                    ret, frame = self.cap.read() if self.cap else (False, None)
+                if not ret:
+                    if self.is_live and self.reconnect():
+                        continue
+                    break
+
+                now = time.time()
+                pts = None
+                if not self.is_live:
+                    pts = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                if self.paced and pts is not None:
+                    if start_wall is None:
+                        start_wall, start_pts = now, pts
+                    wait = (start_wall + (pts - start_pts)) - now
+                    if wait > 0 and self.stop_event.wait(wait):
+                        break
+                    now = time.time()
+
+                frames_dropped = self.ring.frames_dropped
+                self.ring.put(frame, now, pts)
+                self.frames_captured += 1
+                self.last_capture_time = now
+                METRICS.inc("frames_captured", camera=self.name)
+                if self.ring.frames_dropped != frames_dropped:
+                    METRICS.inc("frames_dropped", self.ring.frames_dropped - frames_dropped, camera=self.name)
+        finally:
+            self.finished_event.set()
+
+    def capture_lag(self):
+        if self.last_capture_time is None:
+            return 0.0
+        return time.time() - self.last_capture_time
+
+    def stats(self):
+        return {
+            "frames_captured": self.frames_captured,
+            "frames_dropped": self.ring.frames_dropped,
+            "reconnects": self.reconnects,
+            "capture_lag_ms": self.capture_lag() * 1000,
+        }
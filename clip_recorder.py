@@ -0,0 +1,209 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from queue import Queue
+
+import cv2
+import numpy as np
+
+import config
+from metrics import METRICS
+from retention import file_size, shard_dir
+
+
+class ClipBuffer:
+    #son kareler (zaman, jpeg baytlari) olarak tutulur; toplam boyut butceyi asinca en eskiler atilir
+    def __init__(self, memory_budget=config.CLIP_MEMORY_BUDGET_MB * 1024 * 1024):
+        self.memory_budget = memory_budget
+        self.frames = deque()
+        self.total_bytes = 0
+        self.frames_evicted = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def append(self, captured_at, data):
+        with self.lock:
+            self.frames.append((captured_at, data))
+            self.total_bytes += len(data)
+            while self.total_bytes > self.memory_budget and len(self.frames) > 1:
+                _, old = self.frames.popleft()
+                self.total_bytes -= len(old)
+                self.frames_evicted += 1
+
+    def evict_before(self, cutoff):
+        with self.lock:
+            while self.frames and self.frames[0][0] < cutoff:
+                _, old = self.frames.popleft()
+                self.total_bytes -= len(old)
+
+    def window(self, start, end):
+        with self.lock:
+            return [(captured_at, data) for captured_at, data in self.frames if start <= captured_at <= end]
+
+
+def write_clip(path, frames, fps=config.CLIP_FPS):
+    #kareler ancak yazim aninda cozulur; oynatma hizi orneklenen karelerin gercek araligindan hesaplanir
+    if not frames:
+        return False
+    if len(frames) > 1:
+        duration = frames[-1][0] - frames[0][0]
+        if duration > 0:
+            fps = min(fps, (len(frames) - 1) / duration)
+    first = cv2.imdecode(np.frombuffer(frames[0][1], dtype=np.uint8), cv2.IMREAD_COLOR)
+    height, width = first.shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), max(1.0, fps), (width, height))
+    if not writer.isOpened():
+        return False
+    try:
+        writer.write(first)
+        for _, data in frames[1:]:
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is not None and image.shape[:2] == (height, width):
+                writer.write(image)
+    finally:
+        writer.release()
+    return True
+
+
+class ClipRecorder:
+    #kamera basina: yakalama halkasi CLIP_FPS ile orneklenir, ihlalde on/son kayit penceresi arka planda klibe yazilir.
+    #klip yolu ihlal kayitlarina ancak klip basariyla yazildiktan sonra baglanir (store verildiyse)
+    def __init__(self, capture, camera_id=None, store=None, clip_dir=config.VIOLATION_CLIP_DIR, pre_roll=config.CLIP_PRE_ROLL_SECONDS,
+                 post_roll=config.CLIP_POST_ROLL_SECONDS, fps=config.CLIP_FPS, frame_width=config.CLIP_FRAME_WIDTH,
+                 jpeg_quality=config.CLIP_JPEG_QUALITY, memory_budget=config.CLIP_MEMORY_BUDGET_MB * 1024 * 1024):
+        self.capture = capture
+        self.camera_id = camera_id
+        self.store = store
+        self.clip_dir = clip_dir
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.fps = fps
+        self.frame_width = frame_width
+        self.jpeg_quality = jpeg_quality
+        self.buffer = ClipBuffer(memory_budget)
+
+        self.pending = []
+        self.pending_lock = threading.Lock()
+        self.write_queue = Queue()
+        self.stop_event = threading.Event()
+        self.sample_thread = None
+        self.write_thread = None
+        self.clips_written = 0
+        self.clips_failed = 0
+
+    def start(self):
+        os.makedirs(self.clip_dir, exist_ok=True)
+        self.stop_event.clear()
+        self.sample_thread = threading.Thread(target=self.sample_loop, daemon=True)
+        self.sample_thread.start()
+        self.write_thread = threading.Thread(target=self.write_loop, daemon=True)
+        self.write_thread.start()
+
+    def stop(self, timeout=5):
+        #bekleyen klipler eldeki karelerle arka planda yazilir; timeout=0 beklemeden doner
+        self.stop_event.set()
+        if timeout:
+            for thread in (self.sample_thread, self.write_thread):
+                if thread:
+                    thread.join(timeout=timeout)
+
+    def build_path(self, timestamp):
+        stamp = timestamp.strftime('%Y%m%d_%H%M%S_%f')
+        if self.camera_id is not None:
+            filename = f"clip_{self.camera_id}_{stamp}.mp4"
+        else:
+            filename = f"clip_{stamp}.mp4"
+        return os.path.join(shard_dir(self.clip_dir, timestamp), filename)
+
+    def request(self, timestamp, event_time=None):
+        #son kayit penceresi henuz kapanmamis bir klibin icine dusen ihlal ayni klibi uzatir.
+        #event_time kaydin yapildigi an olmali; tampon sadece son pre_roll saniyeyi tutar, daha eski bir an icin kare kalmamis olabilir
+        event_time = time.time() if event_time is None else event_time
+        with self.pending_lock:
+            for request in self.pending:
+                if request[0] <= event_time <= request[1]:
+                    request[1] = event_time + self.post_roll
+                    request[4] = max(request[4], timestamp)
+                    return request[2]
+            path = self.build_path(timestamp)
+            #[pencere basi, pencere sonu, yol, ilk ihlal zamani, son ihlal zamani]
+            self.pending.append([event_time - self.pre_roll, event_time + self.post_roll, path, timestamp, timestamp])
+            return path
+
+    def encode_frame(self, image):
+        img_h, img_w = image.shape[:2]
+        if self.frame_width and img_w > self.frame_width:
+            image = cv2.resize(image, (self.frame_width, int(img_h * self.frame_width / img_w)), interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return buffer.tobytes() if ok else None
+
+    def sample_loop(self):
+        interval = 1.0 / self.fps
+        last_seq = -1
+        next_sample = time.perf_counter()
+        try:
+            while not self.stop_event.wait(max(0.0, next_sample - time.perf_counter())):
+                next_sample += interval
+                if next_sample < time.perf_counter():
+                    next_sample = time.perf_counter() + interval
+
+                captured = self.capture.ring.latest(last_seq, consume=False)
+                if captured is not None:
+                    last_seq = captured.seq
+                    with METRICS.stage("clip_encode", self.camera_id):
+                        data = self.encode_frame(captured.image)
+                    if data is not None:
+                        self.buffer.append(captured.captured_at, data)
+                self.flush_ready(time.time())
+        finally:
+            self.flush_ready(float("inf"))
+            self.write_queue.put(None)
+
+    def flush_ready(self, now):
+        with self.pending_lock:
+            ready = [request for request in self.pending if request[1] <= now]
+            self.pending = [request for request in self.pending if request[1] > now]
+            oldest_needed = min([request[0] for request in self.pending], default=now - self.pre_roll)
+        #pencere kareleri simdi alinir; tampon bu noktadan sonra eskilerini atabilir
+        for start, end, path, first_timestamp, last_timestamp in ready:
+            self.write_queue.put((path, self.buffer.window(start, end), first_timestamp, last_timestamp))
+        self.buffer.evict_before(min(oldest_needed, now - self.pre_roll))
+        METRICS.set_gauge("clip_buffer_bytes", self.buffer.total_bytes, camera=self.camera_id)
+
+    def write_loop(self):
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                break
+            path, frames, first_timestamp, last_timestamp = item
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with METRICS.stage("clip_write", self.camera_id):
+                    written = write_clip(path, frames, self.fps)
+                if not written:
+                    raise ValueError("kare yok ya da video yazıcı açılamadı")
+                self.clips_written += 1
+            except Exception as e:
+                print(f"İhlal klibi kaydedilemedi ({path}): {e}")
+                self.clips_failed += 1
+                continue
+            if self.store:
+                try:
+                    self.store.attach_clip(path, file_size(path), self.camera_id, first_timestamp, last_timestamp)
+                except sqlite3.Error as e:
+                    #kapanista veritabani klipten once kapanmis olabilir
+                    print(f"İhlal klibi kayıtlara bağlanamadı ({path}): {e}")
+
+    def stats(self):
+        return {
+            "buffered_frames": len(self.buffer),
+            "buffered_bytes": self.buffer.total_bytes,
+            "frames_evicted": self.buffer.frames_evicted,
+            "pending": len(self.pending),
+            "written": self.clips_written,
+            "failed": self.clips_failed,
+        }
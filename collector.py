@@ -0,0 +1,256 @@
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+from retention import shard_dir
+from uploader import BATCH_CONTENT_TYPE, SITE_ID_PATTERN, STORE_UUID_PATTERN, UPLOAD_PATH, decode_batch
+from violation_store import TIMESTAMP_FORMAT, format_timestamp
+
+QUERY_PATH = "/api/v1/violations"
+SITES_PATH = "/api/v1/sites"
+MAX_BODY_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS violations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site_id TEXT NOT NULL,
+    store_uuid TEXT NOT NULL,
+    local_id INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    camera_id TEXT,
+    track_id INTEGER,
+    x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
+    confidence REAL,
+    image_path TEXT,
+    received_at TEXT NOT NULL,
+    UNIQUE (site_id, store_uuid, local_id)
+);
+CREATE INDEX IF NOT EXISTS idx_collector_timestamp ON violations (timestamp);
+CREATE INDEX IF NOT EXISTS idx_collector_site_timestamp ON violations (site_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_collector_site_camera_timestamp ON violations (site_id, camera_id, timestamp);
+"""
+
+SELECT_COLUMNS = "site_id, store_uuid, local_id, timestamp, camera_id, track_id, x1, y1, x2, y2, confidence, image_path, received_at"
+
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def row_to_dict(row):
+    site_id, store_uuid, local_id, timestamp, camera_id, track_id, x1, y1, x2, y2, confidence, image_path, received_at = row
+    return {
+        "site_id": site_id,
+        "store_uuid": store_uuid,
+        "id": local_id,
+        "timestamp": timestamp,
+        "camera_id": camera_id,
+        "track_id": track_id,
+        "box": [x1, y1, x2, y2] if x1 is not None else None,
+        "confidence": confidence,
+        "image_path": image_path,
+        "received_at": received_at,
+    }
+
+
+class CollectorStore:
+    #sahalardan gelen kayitlar; (site_id, store_uuid, local_id) tekil oldugu icin ayni batch'in tekrar gonderilmesi zararsizdir.
+    #store_uuid sayesinde yeniden olusturulan ya da ayni makinedeki ikinci veritabaninin kayitlari tekrar sanilmaz
+    def __init__(self, base_dir=config.COLLECTOR_DIR):
+        self.base_dir = base_dir
+        self.image_dir = os.path.join(base_dir, "images")
+        os.makedirs(self.image_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(base_dir, "collector.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def ingest(self, site_id, store_uuid, items):
+        #kayitlar dogrulanir, goruntuler yazilir ve kayitlar tek islemde eklenir; ekleme basarisiz olursa yazilan goruntuler silinir
+        if not SITE_ID_PATTERN.match(site_id):
+            raise ValueError(f"Geçersiz site_id: {site_id}")
+        if not STORE_UUID_PATTERN.match(store_uuid):
+            raise ValueError(f"Geçersiz store_uuid: {store_uuid}")
+        received_at = format_timestamp(datetime.datetime.now())
+        rows, images = [], []
+        with self.lock:
+            local_ids = [int(record["id"]) for record, _ in items]
+            existing = set()
+            for start in range(0, len(local_ids), 500):
+                chunk = local_ids[start:start + 500]
+                existing.update(row[0] for row in self.conn.execute(
+                    f"SELECT local_id FROM violations WHERE site_id = ? AND store_uuid = ? AND local_id IN ({','.join('?' * len(chunk))})",
+                    [site_id, store_uuid, *chunk]))
+            for (record, image), local_id in zip(items, local_ids):
+                if local_id in existing:
+                    continue
+                timestamp = datetime.datetime.strptime(record["timestamp"], TIMESTAMP_FORMAT)
+                image_path = None
+                if image:
+                    image_path = os.path.join(shard_dir(os.path.join(self.image_dir, site_id), timestamp), f"{store_uuid}_{local_id}.jpg")
+                    images.append((image_path, image))
+                box = record.get("box")
+                x1, y1, x2, y2 = (int(v) for v in box) if box else (None, None, None, None)
+                rows.append((site_id, store_uuid, local_id, record["timestamp"],
+                             str(record["camera_id"]) if record.get("camera_id") is not None else None,
+                             record.get("track_id"), x1, y1, x2, y2, record.get("confidence"), image_path, received_at))
+                existing.add(local_id)
+            written = []
+            try:
+                for image_path, image in images:
+                    write_atomic(image_path, image)
+                    written.append(image_path)
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT OR IGNORE INTO violations (site_id, store_uuid, local_id, timestamp, camera_id, track_id, x1, y1, x2, y2, "
+                        "confidence, image_path, received_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            except Exception:
+                for image_path in written:
+                    try:
+                        os.unlink(image_path)
+                    except OSError:
+                        pass
+                raise
+        return {"accepted": len(rows), "duplicates": len(items) - len(rows), "last_id": local_ids[-1] if local_ids else None}
+
+    def query(self, site_id=None, camera_id=None, since=None, until=None, limit=100):
+        clauses, params = [], []
+        for column, operator, value in (("site_id", "=", site_id), ("camera_id", "=", camera_id),
+                                        ("timestamp", ">", since), ("timestamp", "<=", until)):
+            if value is not None:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {SELECT_COLUMNS} FROM violations{where} ORDER BY timestamp DESC, id DESC LIMIT ?",
+                                     params + [limit]).fetchall()
+        return [row_to_dict(row) for row in rows]
+
+    def sites(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT site_id, COUNT(*), MAX(timestamp), MAX(received_at) FROM violations GROUP BY site_id").fetchall()
+        return [{"site_id": site_id, "count": count, "last_violation": last_violation, "last_received": last_received}
+                for site_id, count, last_violation, last_received in rows]
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    #keep-alive icin HTTP/1.1; sahalar tek baglantiyi batch'ler boyunca kullanir
+    protocol_version = "HTTP/1.1"
+    #bos bekleyen baglantilar kapatilir; istemci bir sonraki istekte yeniden baglanir
+    timeout = 120
+    store = None
+    token = None
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def authorized(self):
+        if self.token and self.headers.get("Authorization") != f"Bearer {self.token}":
+            self.send_json(401, {"error": "Yetkisiz istek"})
+            return False
+        return True
+
+    def do_POST(self):
+        path = urllib.parse.urlsplit(self.path).path
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            #govde uzunlugu bilinmeden baglanti yeniden kullanilamaz
+            self.close_connection = True
+            self.send_json(400, {"error": "Geçersiz Content-Length"})
+            return
+        #govde her durumda okunur; aksi halde keep-alive baglantisi bozulur
+        body = self.rfile.read(length) if 0 < length <= MAX_BODY_BYTES else b""
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self.send_json(413, {"error": "Paket çok büyük"})
+            return
+        if not self.authorized():
+            return
+        if path != UPLOAD_PATH:
+            self.send_json(404, {"error": "Bulunamadı"})
+            return
+        if self.headers.get("Content-Type") != BATCH_CONTENT_TYPE:
+            self.send_json(415, {"error": "Desteklenmeyen içerik türü"})
+            return
+        try:
+            site_id, store_uuid, items = decode_batch(body)
+            result = self.store.ingest(site_id, store_uuid, items)
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except (sqlite3.Error, OSError) as e:
+            #istemci ayni batch'i daha sonra tekrar gonderir
+            self.send_json(500, {"error": str(e)})
+            return
+        self.send_json(200, result)
+
+    def do_GET(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        if not self.authorized():
+            return
+        if parsed.path == SITES_PATH:
+            self.send_json(200, self.store.sites())
+        elif parsed.path == QUERY_PATH:
+            params = {key: values[-1] for key, values in urllib.parse.parse_qs(parsed.query).items()}
+            try:
+                limit = min(int(params.get("limit", 100)), 1000)
+            except ValueError:
+                self.send_json(400, {"error": "Geçersiz limit"})
+                return
+            self.send_json(200, self.store.query(params.get("site_id"), params.get("camera_id"), params.get("since"),
+                                                 params.get("until"), limit))
+        else:
+            self.send_json(404, {"error": "Bulunamadı"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_server(host=config.COLLECTOR_HOST, port=config.COLLECTOR_PORT, base_dir=config.COLLECTOR_DIR, token=None):
+    handler = type("BoundCollectorHandler", (CollectorHandler,), {"store": CollectorStore(base_dir), "token": token})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sahalardan gelen ihlal kayıtlarını toplayan referans servis.")
+    parser.add_argument("--host", default=config.COLLECTOR_HOST)
+    parser.add_argument("--port", type=int, default=config.COLLECTOR_PORT)
+    parser.add_argument("--dir", default=config.COLLECTOR_DIR, help="Veritabanı ve görüntülerin tutulacağı klasör")
+    parser.add_argument("--token", help="Yüklemelerde beklenen erişim anahtarı")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.dir, args.token)
+    print(f"Toplama servisi: http://{args.host}:{args.port}{UPLOAD_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.RequestHandlerClass.store.close()
@@ -5,6 +5,8 @@ MODEL_PATH = "models/best.pt"
 LOG_DIR = "log"
 VIOLATION_IMG_DIR = os.path.join(LOG_DIR, "violations")
 LOG_FILE_PATH = os.path.join(LOG_DIR, "violations.log")
+DB_PATH = os.path.join(LOG_DIR, "violations.db")
+VIOLATION_CLIP_DIR = os.path.join(LOG_DIR, "clips")
 
 #parametreler - gelismis ayarlar icin
 DEFAULT_CONFIDENCE = 0.55 
@@ -14,12 +16,152 @@ HELMET_CLASS_ID = 1
 #zone ayarlari
 LOG_COOLDOWN_SECONDS = 10.0 
 LOG_ZONE_RADIUS = 75
+ZONE_BUCKET_SECONDS = 1.0
+
+#iz basina ihlal onayi: son VIOLATION_CONFIRM_WINDOW karenin en az VIOLATION_CONFIRM_HITS'inde esik ustu ihlal gerekir
+VIOLATION_CONFIRM_HITS = 3
+VIOLATION_CONFIRM_WINDOW = 5
+#onaydan sonra en iyi kare icin beklenen sure; iz daha once biterse kayit hemen yapilir
+VIOLATION_BEST_FRAME_SECONDS = 1.0
+TRACK_LOST_SECONDS = 2.0
 
 #bildirim cooldown
 NOTIFICATION_COOLDOWN_SECONDS = 10
 
+#uyari kanallari: her kanalin kendi hiz siniri (bekleme suresi) ve yeniden denemesi vardir;
+#bekleme suresi icinde gelen ihlaller kamera basina tek ozet mesajda toplanir
+ALERT_DESKTOP_ENABLED = True
+ALERT_DESKTOP_INTERVAL_SECONDS = NOTIFICATION_COOLDOWN_SECONDS
+ALERT_WEBHOOK_URL = None
+ALERT_WEBHOOK_INTERVAL_SECONDS = 5.0
+ALERT_WEBHOOK_TIMEOUT_SECONDS = 5.0
+ALERT_FILE_PATH = None
+ALERT_FILE_INTERVAL_SECONDS = 0.0
+ALERT_SOCKET_ADDRESS = None
+ALERT_SOCKET_INTERVAL_SECONDS = 0.0
+ALERT_RETRY_ATTEMPTS = 3
+ALERT_RETRY_BACKOFF_SECONDS = 1.0
+ALERT_DIGEST_MAX_TRACK_IDS = 20
+
 
 TURKISH_MONTHS = (
     "Ocak", "Şubat", "Mart", "Nisan", "Mayıs", "Haziran",
     "Temmuz", "Ağustos", "Eylül", "Ekim", "Kasım", "Aralık"
-)
\ No newline at end of file
+)
+
+#coklu kamera motoru
+TRACKER_CONFIG = "botsort.yaml"
+TRACKER_MIN_CONFIDENCE = 0.1
+TRACKER_FRAME_RATE = 30
+ENGINE_MAX_BATCH_SIZE = 16
+ENGINE_IDLE_SLEEP_SECONDS = 0.01
+#bozuk kare ya da gecici backend hatasinda batch atlanir; art arda bu kadar hatadan sonra islem durdurulur
+ENGINE_MAX_CONSECUTIVE_ERRORS = 10
+
+#yakalama (capture) ayarlari
+CAPTURE_RING_SIZE = 2
+CAPTURE_RECONNECT_INITIAL_DELAY = 1.0
+CAPTURE_RECONNECT_MAX_DELAY = 30.0
+DISPLAY_POLL_INTERVAL_MS = 10
+DISPLAY_MAX_FPS = 30
+
+#ihlal kayit (writer) ayarlari
+VIOLATION_JPEG_QUALITY = 95
+VIOLATION_IMAGE_MAX_WIDTH = None
+WRITER_NUM_WORKERS = 2
+WRITER_QUEUE_SIZE = 64
+WRITER_RECORD_BATCH_SIZE = 64
+WRITER_OVERFLOW_POLICY = "drop_oldest"
+
+#headless servis
+HEADLESS_STATS_INTERVAL_SECONDS = 30
+
+#offline toplu analiz
+BATCH_FRAME_STRIDE = 1
+BATCH_INFERENCE_SIZE = 16
+BATCH_NUM_WORKERS = 1
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+#metrikler (kapaliyken ek yuk yok denecek kadar azdir)
+METRICS_ENABLED = False
+METRICS_HTTP_HOST = "127.0.0.1"
+METRICS_HTTP_PORT = 9108
+METRICS_LOG_INTERVAL_SECONDS = 60
+
+#cikarim altyapisi: "pytorch", "onnx" veya "openvino"
+INFERENCE_BACKEND = "pytorch"
+INFERENCE_INT8 = False
+#openvino INT8 kalibrasyonu icin baret goruntulerinden olusan veri seti (YOLO data.yaml); None ise COCO kullanilir
+INFERENCE_INT8_CALIBRATION_DATA = None
+#pytorch, onnxruntime ve openvino cikarim thread sayisi (0: kutuphanenin varsayilani)
+INFERENCE_THREADS = 0
+INFERENCE_IMAGE_SIZE = 640
+
+#cikarim worker surecleri (0: cikarim ana surecte yapilir); kareler paylasilan bellek yuvalariyla aktarilir
+INFERENCE_WORKERS = 0
+WORKER_SLOTS_PER_CAMERA = 2
+#worker hazir olmadan durursa ya da bu surede hazir olmazsa hata verilir
+WORKER_START_TIMEOUT_SECONDS = 300.0
+#duran worker artan beklemeyle yeniden baslatilir; bu sureden uzun calisan worker'in sayaci sifirlanir
+WORKER_RESTART_BACKOFF_SECONDS = 1.0
+WORKER_RESTART_MAX_BACKOFF_SECONDS = 60.0
+WORKER_MAX_RESTARTS = 5
+WORKER_STABLE_SECONDS = 120.0
+
+#uyarlamali cikarim zamanlayicisi: yetisilemeyince once cikarim boyutu kuculur, sonra kare atlanir
+SCHEDULER_TARGET_FPS = 15
+SCHEDULER_IMAGE_SIZES = (INFERENCE_IMAGE_SIZE, 512, 416, 320)
+SCHEDULER_MAX_STRIDE = 3
+SCHEDULER_LOAD_HIGH = 0.9
+SCHEDULER_LOAD_LOW = 0.5
+SCHEDULER_ADJUST_INTERVAL_SECONDS = 2.0
+
+#ilgi alani (ROI): [x1, y1, x2, y2] dikdortgen ya da [[x, y], ...] poligon; 0-1 arasi degerler kareye oranlanir
+DEFAULT_ROI = None
+CAMERA_ROIS = {}
+
+#hareket kapisi: sahne durgunken ve son cikarimda tespit yokken model calistirilmaz
+MOTION_GATE_ENABLED = True
+MOTION_FRAME_WIDTH = 160
+MOTION_PIXEL_THRESHOLD = 25
+MOTION_MIN_AREA_RATIO = 0.002
+MOTION_BACKGROUND_RATE = 0.05
+MOTION_HOLD_SECONDS = 2.0
+MOTION_KEYFRAME_INTERVAL_SECONDS = 5.0
+
+#ihlal klipleri: son kareler bellekte kucuk JPEG olarak tutulur, ihlalde on/son kayit penceresi klibe yazilir
+CLIP_RECORDING_ENABLED = True
+CLIP_PRE_ROLL_SECONDS = 5.0
+CLIP_POST_ROLL_SECONDS = 5.0
+CLIP_FPS = 10
+CLIP_FRAME_WIDTH = 640
+CLIP_JPEG_QUALITY = 70
+CLIP_MEMORY_BUDGET_MB = 32
+
+#ihlal goruntuleri: saklama kotalari, kucuk resimler ve onizleme onbellegi
+#yas siniri varsayilan olarak kapali (None); acilirsa aktarilan eski kayitlar da bu sinira tabidir
+RETENTION_MAX_AGE_DAYS = None
+RETENTION_MAX_DISK_MB = 5000
+RETENTION_CHECK_INTERVAL_SECONDS = 600
+RETENTION_DELETE_BATCH_SIZE = 200
+THUMBNAIL_WIDTH = 320
+THUMBNAIL_JPEG_QUALITY = 80
+PREVIEW_CACHE_SIZE = 64
+
+#merkezi toplama servisine yukleme (UPLOAD_URL None ise kapali); yuklenmemis kayitlar veritabaninda bekler
+UPLOAD_URL = None
+UPLOAD_SITE_ID = None
+UPLOAD_TOKEN = None
+UPLOAD_BATCH_SIZE = 50
+UPLOAD_MAX_BATCH_MB = 8
+UPLOAD_INTERVAL_SECONDS = 5.0
+UPLOAD_TIMEOUT_SECONDS = 30.0
+UPLOAD_RETRY_INITIAL_SECONDS = 2.0
+UPLOAD_RETRY_MAX_SECONDS = 300.0
+UPLOAD_IMAGE_MAX_WIDTH = 960
+UPLOAD_JPEG_QUALITY = 75
+
+#referans toplama (collector) servisi
+COLLECTOR_HOST = "127.0.0.1"
+COLLECTOR_PORT = 9120
+COLLECTOR_DIR = "collector"
@@ -0,0 +1,81 @@
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import config
+from frame_buffer import draw_overlay
+
+
+class DisplayRenderer:
+    #hedef boyut <Configure> olayinda onbellege alinir; olcekleme/RGB tamponlari ve PhotoImage kareler arasinda yeniden kullanilir
+    def __init__(self, label=None, max_fps=config.DISPLAY_MAX_FPS):
+        self.label = label
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.last_render_time = 0.0
+        self.container_size = None
+        self.geometry = None
+        self.resize_buffer = None
+        self.rgb_buffer = None
+        self.photo = None
+        if label is not None:
+            label.bind("<Configure>", self.on_configure, add="+")
+
+    def on_configure(self, event):
+        self.resize(event.width, event.height)
+
+    def resize(self, width, height):
+        if (width, height) != self.container_size:
+            self.container_size = (width, height)
+            self.geometry = None
+
+    def time_until_due(self, now=None):
+        now = time.perf_counter() if now is None else now
+        return max(0.0, self.last_render_time + self.min_interval - now)
+
+    def compute_geometry(self, shape):
+        img_h, img_w = shape[:2]
+        container_w, container_h = self.container_size
+        scale = min(container_w / img_w, container_h / img_h, 1.0)
+        size = (max(1, int(img_w * scale)), max(1, int(img_h * scale)))
+        self.resize_buffer = np.empty((size[1], size[0], 3), dtype=np.uint8) if scale < 1.0 else None
+        self.rgb_buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self.photo = None
+        self.geometry = (shape, scale, size)
+
+    def convert(self, image, overlay=()):
+        #kareyi kapsayiciya sigdirip RGB tampona yazar; tampon bir sonraki karede tekrar kullanilir
+        if self.container_size is None and self.label is not None:
+            self.resize(self.label.winfo_width(), self.label.winfo_height())
+        if self.container_size is None or min(self.container_size) <= 1:
+            return None
+        if self.geometry is None or self.geometry[0] != image.shape:
+            self.compute_geometry(image.shape)
+
+        _, scale, size = self.geometry
+        source = image
+        if self.resize_buffer is not None:
+            source = cv2.resize(image, size, dst=self.resize_buffer, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+        draw_overlay(self.rgb_buffer, overlay, scale=scale, rgb=True)
+        return Image.frombuffer("RGB", size, self.rgb_buffer, "raw", "RGB", 0, 1)
+
+    def render(self, image, overlay=()):
+        pil_image = self.convert(image, overlay)
+        if pil_image is None:
+            return False
+        if self.photo is None:
+            from PIL import ImageTk
+            self.photo = ImageTk.PhotoImage(image=pil_image)
+            self.label.config(image=self.photo)
+        else:
+            self.photo.paste(pil_image)
+        self.last_render_time = time.perf_counter()
+        return True
+
+    def clear(self):
+        self.photo = None
+        self.geometry = None
+        if self.label is not None:
+            self.label.config(image="", text="")
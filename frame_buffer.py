@@ -0,0 +1,33 @@
+from collections import namedtuple
+
+import cv2
+
+#kareler yakalandiktan sonra salt-okunur olur; capture, inference, ekran ve snapshot ayni tamponu paylasir.
+#tampon, ona referans tutan son tuketici de biraktiginda serbest kalir (python referans sayaci)
+Frame = namedtuple("Frame", ["seq", "image", "captured_at", "pts"])
+
+VIOLATION_COLOR = (0, 0, 255)
+HELMET_COLOR = (0, 255, 0)
+
+
+def freeze_image(image):
+    image.flags.writeable = False
+    return image
+
+
+def draw_overlay(image, overlay, scale=1.0, rgb=False, font_scale=0.6):
+    #overlay: (box, label, bgr_color) listesi; kutular her zaman hedef tampona cizilir, paylasilan kareye degil
+    for (x1, y1, x2, y2), label, color in overlay:
+        if scale != 1.0:
+            x1, y1, x2, y2 = int(x1 * scale), int(y1 * scale), int(x2 * scale), int(y2 * scale)
+        if rgb:
+            color = color[::-1]
+        cv2.rectangle(image, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(image, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, 2)
+    return image
+
+
+def render_snapshot(image, overlay, font_scale=0.7):
+    if not overlay:
+        return image
+    return draw_overlay(image.copy(), overlay, font_scale=font_scale)
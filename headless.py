@@ -0,0 +1,200 @@
+import argparse
+import json
+import signal
+import threading
+import time
+
+import config
+
+
+def parse_source(value):
+    return int(value) if value.isdigit() else value
+
+
+def parse_source_arg(value):
+    #"kamera_id=kaynak" ya da sadece "kaynak"
+    if "=" in value and not value.split("=", 1)[0].count(":"):
+        camera_id, source = value.split("=", 1)
+        return camera_id, parse_source(source)
+    return None, parse_source(value)
+
+
+def parse_address(value):
+    #"host:port" ya da ayar dosyasindan [host, port]
+    if isinstance(value, str):
+        host, port = value.rsplit(":", 1)
+        return host, int(port)
+    return tuple(value)
+
+
+def load_settings(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_settings(args):
+    settings = {
+        "model": config.MODEL_PATH,
+        "confidence": config.DEFAULT_CONFIDENCE,
+        "show_boxes": True,
+        "tracker": config.TRACKER_CONFIG,
+        "batch_size": config.ENGINE_MAX_BATCH_SIZE,
+        "db": config.DB_PATH,
+        "backend": config.INFERENCE_BACKEND,
+        "int8": config.INFERENCE_INT8,
+        "threads": config.INFERENCE_THREADS,
+        "target_fps": config.SCHEDULER_TARGET_FPS,
+        "workers": config.INFERENCE_WORKERS,
+        "alert_webhook": config.ALERT_WEBHOOK_URL,
+        "alert_file": config.ALERT_FILE_PATH,
+        "alert_socket": config.ALERT_SOCKET_ADDRESS,
+        "upload_url": config.UPLOAD_URL,
+        "site_id": config.UPLOAD_SITE_ID,
+        "upload_token": config.UPLOAD_TOKEN,
+        "stats_interval": config.HEADLESS_STATS_INTERVAL_SECONDS,
+        "metrics_port": None,
+        "metrics_log_interval": None,
+        "sources": {},
+        "rois": {},
+    }
+    if args.config:
+        settings.update(load_settings(args.config))
+
+    for key in ("model", "confidence", "tracker", "batch_size", "db", "stats_interval", "metrics_port", "metrics_log_interval",
+                "backend", "threads", "target_fps", "workers", "alert_webhook", "alert_file", "alert_socket",
+                "upload_url", "site_id", "upload_token"):
+        value = getattr(args, key)
+        if value is not None:
+            settings[key] = value
+    if args.hide_boxes:
+        settings["show_boxes"] = False
+    if args.int8:
+        settings["int8"] = True
+    if settings["alert_socket"]:
+        settings["alert_socket"] = parse_address(settings["alert_socket"])
+
+    sources = {str(k): parse_source(str(v)) for k, v in settings["sources"].items()}
+    for value in args.sources:
+        camera_id, source = parse_source_arg(value)
+        if camera_id is None:
+            index = len(sources) + 1
+            while f"cam{index}" in sources:
+                index += 1
+            camera_id = f"cam{index}"
+        sources[camera_id] = source
+    settings["sources"] = sources
+    return settings
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Baret Takip Sistemi - arayüzsüz (headless) servis modu")
+    parser.add_argument("sources", nargs="*", help="Video kaynakları: 'cam1=rtsp://...', dosya yolu ya da kamera indeksi")
+    parser.add_argument("--config", help="JSON ayar dosyası")
+    parser.add_argument("--model", help="Model dosyası")
+    parser.add_argument("--confidence", type=float, help="Güven eşiği")
+    parser.add_argument("--tracker", help="Tracker ayar dosyası (botsort.yaml, bytetrack.yaml)")
+    parser.add_argument("--batch-size", dest="batch_size", type=int, help="Tek seferde işlenecek en fazla kare")
+    parser.add_argument("--db", help="İhlal veritabanı yolu")
+    parser.add_argument("--stats-interval", dest="stats_interval", type=float, help="İstatistik yazdırma aralığı (sn), 0 kapalı")
+    parser.add_argument("--backend", choices=("pytorch", "onnx", "openvino"), help="Çıkarım altyapısı")
+    parser.add_argument("--int8", action="store_true", help="INT8 nicemlenmiş modeli kullan")
+    parser.add_argument("--threads", type=int, help="Çıkarım thread sayısı")
+    parser.add_argument("--target-fps", dest="target_fps", type=float, help="Kamera başına hedef çıkarım FPS'i, 0 sınırsız")
+    parser.add_argument("--workers", type=int, help="Çıkarım worker süreci sayısı, 0 ana süreçte çalıştırır")
+    parser.add_argument("--alert-webhook", dest="alert_webhook", help="İhlal uyarılarının POST edileceği webhook adresi")
+    parser.add_argument("--alert-file", dest="alert_file", help="İhlal uyarılarının JSON satırı olarak ekleneceği dosya")
+    parser.add_argument("--alert-socket", dest="alert_socket", type=parse_address, help="İhlal uyarılarının UDP ile gönderileceği host:port")
+    parser.add_argument("--upload-url", dest="upload_url", help="İhlallerin toplu yükleneceği merkezi toplama servisi adresi")
+    parser.add_argument("--site-id", dest="site_id", help="Toplama servisinde bu sahayı tanımlayan ad (varsayılan: makine adı)")
+    parser.add_argument("--upload-token", dest="upload_token", help="Toplama servisi erişim anahtarı")
+    parser.add_argument("--hide-boxes", action="store_true", help="Kaydedilen görüntülere kutu çizme")
+    parser.add_argument("--metrics-port", dest="metrics_port", type=int, help="Prometheus /metrics uç noktası için port")
+    parser.add_argument("--metrics-log-interval", dest="metrics_log_interval", type=float, help="Metrik özetini her N saniyede yazdır")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    settings = build_settings(parse_args(argv))
+    if not settings["sources"]:
+        print("Hata: En az bir video kaynağı belirtilmeli.")
+        return 2
+
+    from metrics import METRICS, StartupProfile
+    from alerts import build_sinks
+
+    startup = StartupProfile()
+    with startup.phase("imports"):
+        from stream_engine import StreamEngine
+        from inference_workers import WorkerError
+
+    if settings["metrics_port"]:
+        METRICS.serve(settings["metrics_port"])
+        print(f"Metrikler: http://{config.METRICS_HTTP_HOST}:{settings['metrics_port']}/metrics")
+    if settings["metrics_log_interval"]:
+        METRICS.start_periodic_log(settings["metrics_log_interval"])
+
+    try:
+        with startup.phase("model_load"):
+            engine = StreamEngine(
+                model_path=settings["model"],
+                tracker_config=settings["tracker"],
+                max_batch_size=settings["batch_size"],
+                confidence=settings["confidence"],
+                show_boxes=settings["show_boxes"],
+                db_path=settings["db"],
+                backend=settings["backend"],
+                int8=settings["int8"],
+                threads=settings["threads"],
+                target_fps=settings["target_fps"],
+                workers=settings["workers"],
+                alert_sinks=build_sinks(desktop=False, console=True, webhook_url=settings["alert_webhook"],
+                                        file_path=settings["alert_file"], socket_address=settings["alert_socket"]),
+                upload_url=settings["upload_url"],
+                site_id=settings["site_id"],
+                upload_token=settings["upload_token"],
+            )
+    except (WorkerError, TimeoutError, ValueError) as e:
+        print(f"Hata: Servis başlatılamadı: {e}")
+        METRICS.shutdown()
+        return 1
+    #kaynak acilamasa da worker'lar, metrik sunucusu ve veritabani ayni yoldan kapatilir
+    try:
+        with startup.phase("sources"):
+            for camera_id, source in settings["sources"].items():
+                try:
+                    engine.add_source(camera_id, source, roi=settings["rois"].get(camera_id))
+                    print(f"Kaynak eklendi: {camera_id} -> {source}")
+                except ValueError as e:
+                    print(f"Hata: {e}")
+        if not engine.streams:
+            return 1
+
+        shutdown_event = threading.Event()
+        signal.signal(signal.SIGINT, lambda *_: shutdown_event.set())
+        signal.signal(signal.SIGTERM, lambda *_: shutdown_event.set())
+
+        engine.start()
+        print(f"Açılış süreleri: {startup.format_summary()}")
+        last_stats_time = time.time()
+        while not shutdown_event.wait(0.5):
+            while not engine.log_queue.empty():
+                engine.log_queue.get_nowait()
+
+            if settings["stats_interval"] and time.time() - last_stats_time >= settings["stats_interval"]:
+                print(engine.stats())
+                last_stats_time = time.time()
+
+            if not engine.streams:
+                print("Tüm kaynaklar sonlandı.")
+                break
+            if engine.error:
+                break
+    finally:
+        engine.stop()
+        engine.store.close()
+        METRICS.shutdown()
+    return 1 if engine.error else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,265 @@
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+import config
+
+BACKEND_PYTORCH = "pytorch"
+BACKEND_ONNX = "onnx"
+BACKEND_OPENVINO = "openvino"
+BACKENDS = (BACKEND_PYTORCH, BACKEND_ONNX, BACKEND_OPENVINO)
+
+
+def exported_model_path(model_path, backend, int8=False):
+    #export edilen model, orijinal agirliklarin yaninda saklanir
+    stem, _ = os.path.splitext(model_path)
+    suffix = "_int8" if int8 else ""
+    if backend == BACKEND_ONNX:
+        return f"{stem}{suffix}.onnx"
+    if backend == BACKEND_OPENVINO:
+        return f"{stem}{suffix}_openvino_model"
+    return model_path
+
+
+def is_export_stale(model_path, export_path):
+    if not os.path.exists(export_path):
+        return True
+    return os.path.getmtime(export_path) < os.path.getmtime(model_path)
+
+
+def quantize_onnx(fp32_path, int8_path):
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError:
+        raise RuntimeError("ONNX INT8 dönüşümü için 'onnxruntime' paketi gerekli: pip install onnxruntime")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+
+def export_model(model_path=config.MODEL_PATH, backend=BACKEND_ONNX, int8=False, imgsz=config.INFERENCE_IMAGE_SIZE, force=False,
+                 calibration_data=config.INFERENCE_INT8_CALIBRATION_DATA):
+    if backend == BACKEND_PYTORCH:
+        return model_path
+    if backend not in BACKENDS:
+        raise ValueError(f"Bilinmeyen çıkarım altyapısı: {backend}")
+    from ultralytics import YOLO
+
+    export_path = exported_model_path(model_path, backend, int8)
+    if not force and not is_export_stale(model_path, export_path):
+        return export_path
+
+    print(f"Model {backend}{' (INT8)' if int8 else ''} formatına dönüştürülüyor: {export_path}")
+    model = YOLO(model_path)
+    if backend == BACKEND_ONNX:
+        fp32_path = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        if int8:
+            return quantize_onnx(fp32_path, export_path)
+        return fp32_path
+    if not int8:
+        return model.export(format="openvino", imgsz=imgsz, dynamic=True)
+    #INT8 kalibrasyonu baret goruntuleriyle yapilmali; verilmezse ultralytics varsayilan COCO setini indirir
+    if calibration_data is None:
+        print("Uyarı: INFERENCE_INT8_CALIBRATION_DATA ayarlı değil, INT8 kalibrasyonu varsayılan COCO verisiyle yapılacak")
+        return model.export(format="openvino", imgsz=imgsz, dynamic=True, int8=True)
+    if not os.path.exists(calibration_data):
+        raise FileNotFoundError(f"Kalibrasyon veri seti bulunamadı: {calibration_data}")
+    return model.export(format="openvino", imgsz=imgsz, dynamic=True, int8=True, data=calibration_data)
+
+
+def configure_threads(threads):
+    if threads is None or threads < 0:
+        raise ValueError(f"Geçersiz thread sayısı: {threads}")
+    if not threads:
+        return
+    #pytorch cikarimi ve on/son isleme icin
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def configure_backend_threads(model, backend, weights, threads):
+    #ultralytics onnxruntime/openvino oturumlarini varsayilan thread havuzuyla acar; OMP_NUM_THREADS ve torch ayari bunlara islemez.
+    #oturum, predictor kurulduktan sonra istenen thread sayisiyla yeniden acilir
+    if not threads or backend == BACKEND_PYTORCH:
+        return
+    backend_model = getattr(getattr(model, "predictor", None), "model", None)
+    if backend == BACKEND_ONNX and hasattr(backend_model, "session"):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        backend_model.session = onnxruntime.InferenceSession(weights, sess_options=options,
+                                                             providers=backend_model.session.get_providers())
+    elif backend == BACKEND_OPENVINO and hasattr(backend_model, "ov_compiled_model"):
+        import openvino as ov
+
+        xml_path = next(Path(weights).glob("*.xml"))
+        core = ov.Core()
+        backend_model.ov_compiled_model = core.compile_model(
+            core.read_model(xml_path), device_name="CPU",
+            config={"INFERENCE_NUM_THREADS": threads, "PERFORMANCE_HINT": "LATENCY"})
+    else:
+        print(f"Uyarı: {backend} için thread sayısı uygulanamadı (ultralytics sürümü desteklenmiyor)")
+
+
+def load_inference_model(model_path=config.MODEL_PATH, backend=config.INFERENCE_BACKEND, int8=config.INFERENCE_INT8,
+                         threads=config.INFERENCE_THREADS, imgsz=config.INFERENCE_IMAGE_SIZE):
+    configure_threads(threads)
+    from ultralytics import YOLO
+
+    weights = export_model(model_path, backend, int8, imgsz)
+    model = YOLO(weights, task="detect")
+    if threads and backend != BACKEND_PYTORCH:
+        #oturum ilk tahminde kurulur; thread ayari ancak ondan sonra uygulanabilir
+        warm_up(model, imgsz)
+        configure_backend_threads(model, backend, weights, threads)
+    return model
+
+
+def warm_up(model, imgsz=config.INFERENCE_IMAGE_SIZE):
+    #predictor kurulumu, bellek ayirma ve cekirdek secimi ilk gercek karede degil acilista odenir
+    dummy = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    model.predict(dummy, imgsz=imgsz, conf=config.TRACKER_MIN_CONFIDENCE, verbose=False)
+
+
+def box_iou(a, b):
+    if not len(a) or not len(b):
+        return np.zeros((len(a), len(b)))
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(br - tl, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def match_detections(reference, candidate, iou_threshold=0.5):
+    #ayni sinifta IoU esigini gecen en iyi eslesmeler (greedy)
+    if not len(reference) or not len(candidate):
+        return 0
+    iou = box_iou(reference[:, :4], candidate[:, :4])
+    iou[reference[:, 5][:, None] != candidate[:, 5][None, :]] = 0
+    matched = 0
+    while True:
+        i, j = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[i, j] < iou_threshold:
+            return matched
+        matched += 1
+        iou[i, :] = 0
+        iou[:, j] = 0
+
+
+def sample_frames(source, count):
+    import cv2
+
+    if os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith((".jpg", ".jpeg", ".png")))[:count]
+        return [cv2.imread(os.path.join(source, n)) for n in names]
+
+    cap = cv2.VideoCapture(source)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or count
+    step = max(1, total // count)
+    frames = []
+    for index in range(0, total, step):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+        if len(frames) == count:
+            break
+    cap.release()
+    return frames
+
+
+def run_backend(model, frames, conf, warmup=3):
+    for frame in frames[:warmup]:
+        model.predict(frame, conf=conf, verbose=False)
+    detections, latencies = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        result = model.predict(frame, conf=conf, verbose=False)[0]
+        latencies.append(time.perf_counter() - start)
+        detections.append(result.boxes.data.cpu().numpy())
+    return detections, latencies
+
+
+def compare_backends(source, model_path=config.MODEL_PATH, variants=None, frames=50, conf=config.DEFAULT_CONFIDENCE,
+                     threads=config.INFERENCE_THREADS, imgsz=config.INFERENCE_IMAGE_SIZE):
+    #her altyapinin hizini ve PyTorch referansina gore tespit uyumunu olcer
+    variants = variants or [(BACKEND_PYTORCH, False), (BACKEND_ONNX, False), (BACKEND_OPENVINO, False), (BACKEND_OPENVINO, True)]
+    images = sample_frames(source, frames)
+    if not images:
+        raise ValueError(f"Kaynaktan kare okunamadı: {source}")
+
+    reference = None
+    report = []
+    for backend, int8 in [(BACKEND_PYTORCH, False)] + [v for v in variants if v != (BACKEND_PYTORCH, False)]:
+        name = f"{backend}{'-int8' if int8 else ''}"
+        try:
+            model = load_inference_model(model_path, backend, int8, threads, imgsz)
+        except Exception as e:
+            print(f"{name}: atlandı ({e})")
+            continue
+        detections, latencies = run_backend(model, images, conf)
+        row = {
+            "backend": name,
+            "mean_ms": float(np.mean(latencies) * 1000),
+            "p95_ms": float(np.percentile(latencies, 95) * 1000),
+            "fps": float(len(latencies) / sum(latencies)),
+        }
+        if reference is None:
+            reference = detections
+            row.update({"precision": 1.0, "recall": 1.0})
+        else:
+            matched = sum(match_detections(ref, det) for ref, det in zip(reference, detections))
+            total_ref = sum(len(ref) for ref in reference)
+            total_det = sum(len(det) for det in detections)
+            row.update({
+                "precision": matched / total_det if total_det else 1.0,
+                "recall": matched / total_ref if total_ref else 1.0,
+            })
+        report.append(row)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modeli ONNX/OpenVINO formatına dönüştürür ve altyapıları karşılaştırır.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Modeli dönüştür ve önbelleğe al")
+    export_parser.add_argument("--backend", choices=BACKENDS[1:], default=BACKEND_ONNX)
+    export_parser.add_argument("--int8", action="store_true")
+    export_parser.add_argument("--force", action="store_true")
+    export_parser.add_argument("--data", default=config.INFERENCE_INT8_CALIBRATION_DATA,
+                               help="OpenVINO INT8 kalibrasyonu için veri seti (YOLO data.yaml)")
+
+    compare_parser = subparsers.add_parser("compare", help="PyTorch referansına göre hız ve doğruluk karşılaştırması")
+    compare_parser.add_argument("source", help="Video dosyası veya görüntü klasörü")
+    compare_parser.add_argument("--frames", type=int, default=50)
+    compare_parser.add_argument("--threads", type=int, default=config.INFERENCE_THREADS)
+
+    for sub in (export_parser, compare_parser):
+        sub.add_argument("--model", default=config.MODEL_PATH)
+        sub.add_argument("--imgsz", type=int, default=config.INFERENCE_IMAGE_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        print(export_model(args.model, args.backend, args.int8, args.imgsz, force=args.force, calibration_data=args.data))
+        return 0
+
+    report = compare_backends(args.source, args.model, frames=args.frames, threads=args.threads, imgsz=args.imgsz)
+    print(f"{'Altyapı':<16}{'ort. ms':>10}{'p95 ms':>10}{'kare/sn':>10}{'kesinlik':>10}{'duyarlılık':>12}")
+    for row in report:
+        print(f"{row['backend']:<16}{row['mean_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['fps']:>10.1f}{row['precision']:>10.3f}{row['recall']:>12.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,400 @@
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+from queue import Empty
+
+import numpy as np
+
+import config
+from inference_backends import export_model, load_inference_model, warm_up
+
+#izler: x1, y1, x2, y2, track_id, conf, cls
+EMPTY_TRACKS = np.zeros((0, 7), dtype=np.float32)
+
+
+class FrameSlots:
+    #kamera basina paylasilan bellekte sabit boyutlu kare yuvalari; kareler sureclere pickle edilmeden aktarilir
+    def __init__(self, shape, count, name=None):
+        self.shape = tuple(shape)
+        self.count = count
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self.shape)) * count)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray((count, *self.shape), dtype=np.uint8, buffer=self.shm.buf)
+        self.free = list(range(count))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self, unlink=False):
+        self.array = None
+        self.shm.close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def worker_main(worker_index, loader, loader_args, tracker_config, task_queue, result_queue, max_batch_size):
+    #worker sureci: kendisine atanan kameralarin tracker'larini tutar, kareleri paylasilan bellekten okur
+    from stream_engine import create_tracker
+
+    model = loader(*loader_args)
+    warm_up(model)
+    result_queue.put(("ready", worker_index, dict(model.names)))
+    streams = {}
+    running = True
+    while running:
+        messages = [task_queue.get()]
+        while len(messages) < max_batch_size:
+            try:
+                messages.append(task_queue.get_nowait())
+            except Empty:
+                break
+
+        frames = []
+        for message in messages:
+            if message is None:
+                running = False
+            elif message[0] == "register":
+                _, camera_id, shm_name, shape, count = message
+                old = streams.pop(camera_id, None)
+                if old:
+                    old[0].close()
+                streams[camera_id] = (FrameSlots(shape, count, name=shm_name), create_tracker(tracker_config))
+            elif message[0] == "unregister":
+                old = streams.pop(message[1], None)
+                if old:
+                    old[0].close()
+            else:
+                frames.append(message)
+
+        groups = {}
+        for message in frames:
+            groups.setdefault(message[3], []).append(message)
+        for imgsz, group in groups.items():
+            group = [message for message in group if message[1] in streams]
+            if not group:
+                continue
+            images = [streams[camera_id][0].array[slot] for _, camera_id, slot, _, _ in group]
+            try:
+                results = model.predict(images, conf=config.TRACKER_MIN_CONFIDENCE, imgsz=imgsz, verbose=False)
+            except Exception as e:
+                print(f"Worker {worker_index}: çıkarım hatası: {e}")
+                results = [None] * len(group)
+            for (_, camera_id, slot, _, token), image, result in zip(group, images, results):
+                tracks, detection_count = EMPTY_TRACKS, 0
+                if result is not None:
+                    det = result.boxes.cpu().numpy()
+                    detection_count = len(det)
+                    if detection_count:
+                        tracks = streams[camera_id][1].update(det, image)
+                        tracks = tracks[:, :7].astype(np.float32) if len(tracks) else EMPTY_TRACKS
+                result_queue.put(("result", camera_id, token, slot, tracks, detection_count))
+        #kaydi silinmis kameralarin yuvalari da geri verilir
+        for _, camera_id, slot, _, token in frames:
+            if camera_id not in streams:
+                result_queue.put(("result", camera_id, token, slot, EMPTY_TRACKS, 0))
+
+    for slots, _ in streams.values():
+        slots.close()
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+class PoolCamera:
+    def __init__(self, worker, slots, next_token=0):
+        self.worker = worker
+        self.slots = slots
+        #yeniden kayitta sifirlanmaz; eski token'larla cakisma olmaz
+        self.next_token = next_token
+        self.submitted_at = {}
+
+
+class InferenceWorkerPool:
+    #kameralar worker sureclerine paylastirilir; her surec kendi kameralarinin tracker durumunu tutar
+    def __init__(self, num_workers=config.INFERENCE_WORKERS, model_path=config.MODEL_PATH, backend=config.INFERENCE_BACKEND,
+                 int8=config.INFERENCE_INT8, threads=config.INFERENCE_THREADS, tracker_config=config.TRACKER_CONFIG,
+                 slots_per_camera=config.WORKER_SLOTS_PER_CAMERA, max_batch_size=config.ENGINE_MAX_BATCH_SIZE, loader=None, loader_args=None,
+                 start_timeout=config.WORKER_START_TIMEOUT_SECONDS, max_restarts=config.WORKER_MAX_RESTARTS):
+        self.num_workers = max(1, num_workers)
+        self.model_path = model_path
+        self.backend = backend
+        self.int8 = int8
+        self.loader = loader or load_inference_model
+        self.loader_args = loader_args if loader_args is not None else (model_path, backend, int8, threads)
+        self.tracker_config = tracker_config
+        self.slots_per_camera = slots_per_camera
+        self.max_batch_size = max_batch_size
+        self.start_timeout = start_timeout
+        self.max_restarts = max_restarts
+
+        self.context = multiprocessing.get_context("spawn")
+        self.result_queue = self.context.Queue()
+        self.task_queues = [None] * self.num_workers
+        self.processes = [None] * self.num_workers
+        self.cameras = {}
+        self.lock = threading.Lock()
+        self.names = None
+        self.held_messages = []
+        self.worker_restarts = 0
+        self.started_at = [0.0] * self.num_workers
+        self.restart_counts = [0] * self.num_workers
+        #yeniden baslatilmayi bekleyen worker'in baslatilma zamani; bu sirada kameralarina kare gonderilmez
+        self.restart_at = [None] * self.num_workers
+        #yeniden baslatilan worker'in hazir olmasi icin son an; hazir mesaji gelene kadar kameralarina kare gonderilmez
+        self.ready_deadline = [None] * self.num_workers
+        self.error = None
+
+    def start(self, timeout=None):
+        if self.loader is load_inference_model:
+            #donusum her worker'da tekrar yapilmasin diye once burada yapilir
+            export_model(self.model_path, self.backend, self.int8)
+        for index in range(self.num_workers):
+            self.start_worker(index)
+        try:
+            self.wait_ready(range(self.num_workers), self.start_timeout if timeout is None else timeout)
+        except (WorkerError, TimeoutError):
+            self.stop(timeout=1)
+            raise
+        return self.names
+
+    def start_worker(self, index):
+        task_queue = self.context.Queue()
+        process = self.context.Process(
+            target=worker_main,
+            args=(index, self.loader, self.loader_args, self.tracker_config, task_queue, self.result_queue, self.max_batch_size),
+            daemon=True,
+        )
+        process.start()
+        self.task_queues[index] = task_queue
+        self.processes[index] = process
+        self.started_at[index] = time.monotonic()
+
+    def wait_ready(self, indexes, timeout=None):
+        #worker hazir olmadan durursa (model yolu, donusum, CUDA hatasi) sonsuza kadar beklenmez.
+        #bekleme sirasinda gelen sonuclar kaybolmasin diye bir sonraki collect'e saklanir
+        waiting = set(indexes)
+        deadline = time.monotonic() + timeout if timeout else None
+        while waiting:
+            try:
+                message = self.result_queue.get(timeout=0.2)
+            except Empty:
+                message = None
+            if message is None:
+                for index in waiting:
+                    process = self.processes[index]
+                    if not process.is_alive():
+                        raise WorkerError(f"Çıkarım worker'ı {index} hazır olmadan durdu (çıkış kodu {process.exitcode})")
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"Çıkarım worker'ı {timeout:.0f} sn içinde hazır olmadı")
+                continue
+            if message[0] == "ready":
+                self.names = message[2]
+                waiting.discard(message[1])
+            else:
+                self.held_messages.append(message)
+
+    def mark_ready(self, index, names):
+        self.names = names
+        if self.ready_deadline[index] is not None:
+            self.ready_deadline[index] = None
+            print(f"Çıkarım worker'ı {index} yeniden başlatıldı.")
+
+    def drain_ready(self):
+        #yeniden baslayan worker'larin hazir mesajlari beklemeden alinir; sonuclar bir sonraki collect'e saklanir
+        try:
+            while True:
+                message = self.result_queue.get_nowait()
+                if message[0] == "ready":
+                    self.mark_ready(message[1], message[2])
+                else:
+                    self.held_messages.append(message)
+        except Empty:
+            pass
+
+    def accepting(self, index):
+        return self.restart_at[index] is None and self.ready_deadline[index] is None
+
+    def stop(self, timeout=5):
+        for task_queue in self.task_queues:
+            if task_queue is not None:
+                task_queue.put(None)
+        for process in self.processes:
+            if process is not None:
+                process.join(timeout=timeout)
+                if process.is_alive():
+                    process.terminate()
+        with self.lock:
+            for camera in self.cameras.values():
+                camera.slots.close(unlink=True)
+            self.cameras.clear()
+
+    def assign_worker(self):
+        counts = [0] * self.num_workers
+        for camera in self.cameras.values():
+            counts[camera.worker] += 1
+        return counts.index(min(counts))
+
+    def register(self, camera_id, shape, worker=None):
+        old = self.cameras.pop(camera_id, None)
+        if worker is None:
+            worker = old.worker if old else self.assign_worker()
+        slots = FrameSlots(shape, self.slots_per_camera)
+        self.task_queues[worker].put(("register", camera_id, slots.name, slots.shape, slots.count))
+        if old:
+            old.slots.close(unlink=True)
+        camera = PoolCamera(worker, slots, old.next_token if old else 0)
+        self.cameras[camera_id] = camera
+        return camera
+
+    def unregister(self, camera_id):
+        with self.lock:
+            camera = self.cameras.pop(camera_id, None)
+            if camera:
+                self.task_queues[camera.worker].put(("unregister", camera_id))
+                camera.slots.close(unlink=True)
+
+    def has_free_slot(self, camera_id):
+        with self.lock:
+            camera = self.cameras.get(camera_id)
+            return camera is None or bool(camera.slots.free)
+
+    def submit(self, camera_id, image, imgsz):
+        with self.lock:
+            camera = self.cameras.get(camera_id)
+            if camera is None or camera.slots.shape != image.shape:
+                #kare boyutu degistiyse yuvalar, ucustaki kareler dondukten sonra yeniden ayrilir
+                if camera is not None and len(camera.slots.free) < camera.slots.count:
+                    return None
+                camera = self.register(camera_id, image.shape)
+            if not camera.slots.free or not self.accepting(camera.worker):
+                return None
+            slot = camera.slots.free.pop()
+            np.copyto(camera.slots.array[slot], image)
+            token = camera.next_token
+            camera.next_token += 1
+            camera.submitted_at[token] = time.perf_counter()
+            self.task_queues[camera.worker].put(("frame", camera_id, slot, imgsz, token))
+            return token
+
+    def collect(self, timeout=0.0):
+        #(kamera, token, izler, ham tespit sayisi, gecikme) listesi
+        messages, self.held_messages = self.held_messages, []
+        try:
+            if messages:
+                messages.append(self.result_queue.get_nowait())
+            else:
+                messages.append(self.result_queue.get(timeout=timeout) if timeout else self.result_queue.get_nowait())
+            while True:
+                messages.append(self.result_queue.get_nowait())
+        except Empty:
+            pass
+
+        results = []
+        now = time.perf_counter()
+        with self.lock:
+            for message in messages:
+                if message[0] == "ready":
+                    self.mark_ready(message[1], message[2])
+                    continue
+                _, camera_id, token, slot, tracks, detection_count = message
+                camera = self.cameras.get(camera_id)
+                if camera is None or token not in camera.submitted_at:
+                    continue
+                camera.slots.free.append(slot)
+                latency = now - camera.submitted_at.pop(token)
+                results.append((camera_id, token, tracks, detection_count, latency))
+        return results
+
+    def infer(self, camera_id, image, imgsz, timeout=10.0):
+        #tek kamerali kullanim (GUI) icin senkron cikarim; bekleme sirasinda GIL serbesttir
+        token = self.submit(camera_id, image, imgsz)
+        if token is None:
+            #worker yeniden baslatilmayi bekliyor olabilir; zamani geldiyse burada baslatilir
+            self.check_workers()
+            return EMPTY_TRACKS, 0
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            for result_camera_id, result_token, tracks, detection_count, _ in self.collect(timeout=0.1):
+                if result_camera_id == camera_id and result_token == token:
+                    return tracks, detection_count
+            if camera_id in self.check_workers():
+                return EMPTY_TRACKS, 0
+        raise TimeoutError("Çıkarım worker'ı yanıt vermedi")
+
+    def drop_in_flight(self, index):
+        #olen worker'daki kareler geri donmeyecek; yuvalari bosaltilir, token'lari unutulur
+        dropped = []
+        with self.lock:
+            for camera_id, camera in self.cameras.items():
+                if camera.worker == index and camera.submitted_at:
+                    camera.submitted_at.clear()
+                    camera.slots.free = list(range(camera.slots.count))
+                    dropped.append(camera_id)
+        return dropped
+
+    def check_workers(self):
+        #olen worker artan beklemeyle yeniden baslatilir; kameralari yeni tracker'larla tekrar kaydedilir.
+        #donus: ucustaki kareleri dusurulen kameralar (cagiran taraf bekledigi token'lari silmeli).
+        #art arda max_restarts kez duran worker icin vazgecilir ve WorkerError verilir.
+        #yeniden baslatma beklemez; worker'in hazir mesaji collect ya da sonraki kontrolde alinir
+        if self.error:
+            raise self.error
+        if any(deadline is not None for deadline in self.ready_deadline):
+            self.drain_ready()
+        dropped = []
+        for index, process in enumerate(self.processes):
+            if process is None:
+                continue
+            now = time.monotonic()
+            if process.is_alive():
+                if self.ready_deadline[index] is None or now < self.ready_deadline[index]:
+                    continue
+                print(f"Çıkarım worker'ı {index} {self.start_timeout:.0f} sn içinde hazır olmadı, durduruluyor.")
+                process.terminate()
+                process.join(timeout=1)
+            if self.restart_at[index] is None:
+                #hazir olmadan duran worker kararli sayilmaz; sayac sifirlanmaz
+                was_ready = self.ready_deadline[index] is None
+                self.ready_deadline[index] = None
+                if was_ready and now - self.started_at[index] > config.WORKER_STABLE_SECONDS:
+                    self.restart_counts[index] = 0
+                self.restart_counts[index] += 1
+                if self.restart_counts[index] > self.max_restarts:
+                    self.error = WorkerError(f"Çıkarım worker'ı {index} art arda {self.max_restarts} kez yeniden başlatıldı ve yine durdu "
+                                             f"(çıkış kodu {process.exitcode})")
+                    raise self.error
+                delay = min(config.WORKER_RESTART_BACKOFF_SECONDS * 2 ** (self.restart_counts[index] - 1),
+                            config.WORKER_RESTART_MAX_BACKOFF_SECONDS)
+                self.restart_at[index] = now + delay
+                dropped.extend(self.drop_in_flight(index))
+                print(f"Çıkarım worker'ı {index} durdu (çıkış kodu {process.exitcode}), {delay:.1f} sn sonra yeniden başlatılıyor.")
+            if now < self.restart_at[index]:
+                continue
+            self.worker_restarts += 1
+            self.start_worker(index)
+            self.restart_at[index] = None
+            self.ready_deadline[index] = now + self.start_timeout
+            #kayit mesajlari kuyrukta bekler; worker model yuklendikten sonra isler
+            with self.lock:
+                for camera_id, camera in list(self.cameras.items()):
+                    if camera.worker == index:
+                        self.register(camera_id, camera.slots.shape, worker=index)
+        return dropped
+
+    def stats(self):
+        with self.lock:
+            per_worker = [sum(1 for camera in self.cameras.values() if camera.worker == index) for index in range(self.num_workers)]
+        return {
+            "workers": self.num_workers,
+            "alive": sum(1 for process in self.processes if process is not None and process.is_alive()),
+            "cameras_per_worker": per_worker,
+            "restarts": self.worker_restarts,
+        }
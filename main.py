@@ -1,19 +1,37 @@
+import time
+#acilis suresi ilk import'tan itibaren olculur
+STARTUP_STARTED_AT = time.perf_counter()
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, simpledialog
-from PIL import Image, ImageTk
-import cv2
 import os
 import datetime
 import threading
-import time
 from queue import Queue
 import math
+import subprocess
+import sys
 
 import config
 from ui_manager import UIManager
-from video_processor import VideoProcessor
-from ultralytics import YOLO
-from plyer import notification
+from video_processor import VideoProcessor, publish_violation, build_overlay, EMPTY_DETECTIONS
+from violation_writer import ViolationWriter
+from violation_store import ViolationStore
+from zone_index import CooldownZoneIndex
+from track_state import ViolationTracks
+from metrics import METRICS, StartupProfile
+from capture import CaptureSource
+from clip_recorder import ClipRecorder
+from display_renderer import DisplayRenderer
+from preview_cache import PreviewCache, load_preview
+from retention import RetentionManager, thumbnail_path
+from inference_backends import load_inference_model, warm_up
+from inference_workers import InferenceWorkerPool
+from alerts import AlertDispatcher, build_sinks
+from uploader import ViolationUploader
+
+STARTUP = StartupProfile(STARTUP_STARTED_AT)
+STARTUP.record("imports", STARTUP.elapsed())
 
 class HardHatApp(tk.Tk):
     def __init__(self):
@@ -25,25 +43,22 @@ class HardHatApp(tk.Tk):
 
         self.setup_theme()
 
-        self.cap = None
-        self.all_logs = []
-        self.log_map = {}
+        self.capture = None
+        self.clip_recorder = None
+        self.current_filter_days = None
+        self.log_cutoff_date = None
         
-        self.frame_lock = threading.Lock()
         self.results_lock = threading.Lock()
-        self.latest_frame = None
-        self.latest_results_for_drawing = []
+        self.latest_results_for_drawing = EMPTY_DETECTIONS
+        self.latest_results_captured_at = None
         self.stop_event = threading.Event()
         self.log_queue = Queue()
-        self.notification_queue = Queue()
         self.processing_thread = None
         self.display_job = None
-        
-        self.video_delay = 15
-        self.last_notification_time = 0
+        self.last_displayed_seq = -1
 
-        self.logged_tracker_ids = set()
-        self.recent_log_zones = []
+        self.violation_tracks = ViolationTracks()
+        self.recent_log_zones = CooldownZoneIndex()
         
         self.confidence_var = tk.DoubleVar(value=config.DEFAULT_CONFIDENCE)
         self.show_boxes_var = tk.BooleanVar(value=True)
@@ -52,12 +67,43 @@ class HardHatApp(tk.Tk):
         self.log_count_var = tk.StringVar(value="Görüntülenen Kayıt: 0")
         
         os.makedirs(config.VIOLATION_IMG_DIR, exist_ok=True)
+        with STARTUP.phase("store"):
+            self.store = ViolationStore()
+        self.alerts = AlertDispatcher(build_sinks())
+        self.alerts.start()
+        self.violation_writer = ViolationWriter(self.store, on_written=lambda event, save_path: publish_violation(self, event, save_path))
+        self.violation_writer.start()
+        self.retention = RetentionManager(self.store, on_purged=lambda count: self.log_queue.put(None))
+        self.retention.start()
+        self.uploader = None
+        if config.UPLOAD_URL:
+            try:
+                self.uploader = ViolationUploader(self.store, config.UPLOAD_URL, config.UPLOAD_SITE_ID, config.UPLOAD_TOKEN)
+            except ValueError as e:
+                print(f"Toplama servisine yükleme kapalı: {e}")
+        if self.uploader:
+            self.uploader.start()
+        self.preview_cache = PreviewCache()
+        self.viewer_window = None
+        self.viewer_record = None
         
-        self.model = self.load_model()
-        self.ui = UIManager(self)
-        self.load_logs_from_disk()
+        if config.METRICS_ENABLED:
+            METRICS.serve()
+        #model arka planda yuklenir; arayuz ve yakalama beklemeden acilir, cikarim model isinca baslar
+        self.model = None
+        self.inference_pool = None
+        self.class_names = {}
+        self.model_ready = threading.Event()
+        self.model_error = None
+        self.model_status_var = tk.StringVar(value="Model: yükleniyor...")
+        with STARTUP.phase("ui"):
+            self.ui = UIManager(self)
+            self.renderer = DisplayRenderer(self.ui.image_label)
+        with STARTUP.phase("log_list"):
+            self.filter_logs()
+        threading.Thread(target=self.import_legacy_logs, daemon=True).start()
+        self.start_model_loading()
         self.check_log_queue()
-        self.check_notification_queue()
 
     def setup_theme(self):
         try:
@@ -71,15 +117,46 @@ class HardHatApp(tk.Tk):
         except Exception as e:
             print(f"Tema yüklenirken hata oluştu: {e}")
 
-    def load_model(self):
+    def start_model_loading(self):
         if not os.path.exists(config.MODEL_PATH):
             messagebox.showerror("Hata", f"Model dosyası bulunamadı: {config.MODEL_PATH}")
+            self.model_status_var.set("Model: bulunamadı")
             self.quit()
+            return
+        threading.Thread(target=self.load_model, daemon=True).start()
+        self.check_model_state()
+
+    def load_model(self):
+        #arka plan thread'i; sonucu check_model_state ana thread'de isler
         try:
-            return YOLO(config.MODEL_PATH)
+            if config.INFERENCE_WORKERS > 0:
+                #cikarim ayri surecte yapilir; arayuz thread'i GIL icin cikarimla yarismaz, isinma worker'da yapilir
+                with STARTUP.phase("model_load"):
+                    pool = InferenceWorkerPool(1)
+                    self.class_names = pool.start()
+                self.inference_pool = pool
+            else:
+                with STARTUP.phase("model_load"):
+                    model = load_inference_model(config.MODEL_PATH)
+                with STARTUP.phase("model_warmup"):
+                    warm_up(model)
+                self.class_names = model.names
+                self.model = model
+            self.model_ready.set()
         except Exception as e:
-            messagebox.showerror("Model Yükleme Hatası", f"Model yüklenirken bir hata oluştu: {e}")
+            self.model_error = e
+
+    def check_model_state(self):
+        if self.model_error is not None:
+            self.model_status_var.set("Model: yüklenemedi")
+            messagebox.showerror("Model Yükleme Hatası", f"Model yüklenirken bir hata oluştu: {self.model_error}")
             self.quit()
+            return
+        if self.model_ready.is_set():
+            self.model_status_var.set("Model: hazır")
+            print(f"Açılış süreleri: {STARTUP.format_summary()}")
+            return
+        self.after(100, self.check_model_state)
 
 
     def open_settings_window(self):
@@ -130,24 +207,17 @@ class HardHatApp(tk.Tk):
     def start_processing_loop(self, source):
         self.stop_processing()
 
-        if isinstance(source, int):
-            self.cap = cv2.VideoCapture(source, cv2.CAP_DSHOW)
-        else:
-            self.cap = cv2.VideoCapture(source)
-
-        if not self.cap.isOpened():
+        self.capture = CaptureSource(source)
+        if not self.capture.start():
             messagebox.showerror("Hata", f"Kaynak açılamadı: {source}")
             self.stop_processing()
             return
-            
-        fps = self.cap.get(cv2.CAP_PROP_FPS)
-        
-        if fps > 0:
-            self.video_delay = int(1000 / fps)
-        else:
-            self.video_delay = 15 
         
         self.stop_event.clear()
+        self.last_displayed_seq = -1
+        if config.CLIP_RECORDING_ENABLED:
+            self.clip_recorder = ClipRecorder(self.capture, store=self.store)
+            self.clip_recorder.start()
         
         processor = VideoProcessor(self)
         self.processing_thread = threading.Thread(target=processor.run, daemon=True)
@@ -171,112 +241,97 @@ class HardHatApp(tk.Tk):
             self.processing_thread.join(timeout=1)
         self.processing_thread = None
 
-        if self.cap:
-            self.cap.release()
-        self.cap = None
+        if self.clip_recorder:
+            self.clip_recorder.stop(timeout=0)
+        self.clip_recorder = None
+
+        if self.capture:
+            self.capture.stop()
+        self.capture = None
 
-        with self.frame_lock:
-            self.latest_frame = None
         with self.results_lock:
-            self.latest_results_for_drawing.clear()
+            self.latest_results_for_drawing = EMPTY_DETECTIONS
+            self.latest_results_captured_at = None
         
-        self.logged_tracker_ids.clear()
+        self.violation_tracks.clear()
         self.recent_log_zones.clear()
         
         self.ui.btn_select_video.config(state=tk.NORMAL)
         self.ui.btn_select_camera.config(state=tk.NORMAL)
         self.ui.btn_connect_ip_camera.config(state=tk.NORMAL)
         self.ui.btn_stop.config(state=tk.DISABLED)
-        self.ui.image_label.config(image=None, text="")
+        self.renderer.clear()
 
     def display_loop(self):
         if self.stop_event.is_set(): return
-        if not self.cap or not self.cap.isOpened():
+        if not self.capture:
             self.stop_processing()
             return
+
+        #ekran FPS siniri: gosterilmeyecek kareler halkadan hic alinmaz
+        delay = self.renderer.time_until_due()
+        if delay > 0:
+            self.display_job = self.after(max(config.DISPLAY_POLL_INTERVAL_MS, int(delay * 1000)), self.display_loop)
+            return
             
-        ret, frame = self.cap.read()
-        if not ret:
-            self.stop_processing()
+        captured = self.capture.ring.latest(self.last_displayed_seq)
+        if captured is None:
+            if self.capture.is_finished():
+                self.stop_processing()
+                return
+            self.display_job = self.after(config.DISPLAY_POLL_INTERVAL_MS, self.display_loop)
             return
         
-        with self.frame_lock: self.latest_frame = frame
+        self.last_displayed_seq = captured.seq
+        frame = captured.image
         
+        overlay = []
         if self.show_boxes_var.get():
-            with self.results_lock: results_to_draw = list(self.latest_results_for_drawing)
-            
-            show_helmets = self.show_helmets_var.get()
-
-            for result in results_to_draw:
-                x1, y1, x2, y2 = result["box"]
-                cls_id = result["cls_id"]
-                label = result["label"]
-                
-                if cls_id == config.VIOLATION_CLASS_ID:
-                    color = (0, 0, 255)
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                    cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-
-                elif show_helmets and cls_id == config.HELMET_CLASS_ID:
-                    color = (0, 255, 0)
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                    cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-
-        self.update_image_display(frame)
+            with self.results_lock:
+                results_to_draw = self.latest_results_for_drawing
+                results_captured_at = self.latest_results_captured_at
+            with METRICS.stage("drawing"):
+                overlay = build_overlay(results_to_draw, self.class_names, self.show_helmets_var.get())
+            if results_captured_at is not None:
+                METRICS.set_gauge("inference_staleness_seconds", captured.captured_at - results_captured_at)
+
+        self.update_image_display(frame, overlay)
         
-        self.display_job = self.after(self.video_delay, self.display_loop)
+        self.display_job = self.after(config.DISPLAY_POLL_INTERVAL_MS, self.display_loop)
             
     def check_log_queue(self):
         try:
+            new_entries = 0
+            purged = False
             while not self.log_queue.empty():
-                datetime_obj, save_path = self.log_queue.get_nowait()
-                self.all_logs.insert(0, (datetime_obj, save_path))
-                self.filter_logs() 
+                #None: liste disarida degisti (saklama politikasi ya da eski log aktarimi)
+                if self.log_queue.get_nowait() is None:
+                    purged = True
+                else:
+                    new_entries += 1
+            if purged:
+                self.ui.log_list.reload()
+                self.update_log_count()
+            elif new_entries:
+                self.ui.log_list.refresh_new_rows()
+                self.update_log_count()
         finally:
             self.after(200, self.check_log_queue)
             
-    def check_notification_queue(self):
-        try:
-            if not self.notification_queue.empty():
-                current_time = time.time()
-                
-                if (current_time - self.last_notification_time) > config.NOTIFICATION_COOLDOWN_SECONDS:
-                    notification_data = self.notification_queue.get_nowait()
-                    
-                    notification.notify(
-                        title=notification_data['title'],
-                        message=notification_data['message'],
-                        app_name='Baret Takip Sistemi',
-                        timeout=10
-                    )
-                    
-                    self.last_notification_time = current_time
-                else:
-                    while not self.notification_queue.empty():
-                        self.notification_queue.get_nowait()
-
-        except Exception as e:
-            print(f"Bildirim kuyruğu işlenirken hata: {e}")
-        finally:
-            self.after(500, self.check_notification_queue)
-
     def clear_logs(self):
-        if not self.all_logs:
+        if not self.store.count():
             messagebox.showinfo("Bilgi", "Temizlenecek log bulunmuyor.")
             return
         if messagebox.askyesno("Onay", "Tüm ihlal kayıtları ve fotoğraflar kalıcı olarak silinecektir. Emin misiniz?"):
             try:
-                self.all_logs.clear()
-                self.log_map.clear()
-                self.ui.log_listbox.delete(0, tk.END)
+                self.retention.clear_all()
+                self.preview_cache.clear()
+                self.ui.log_list.clear()
                 self.update_log_count()
                 
-                self.logged_tracker_ids.clear()
+                self.violation_tracks.clear()
                 self.recent_log_zones.clear()
                 with open(config.LOG_FILE_PATH, 'w') as f: pass
-                for filename in os.listdir(config.VIOLATION_IMG_DIR):
-                    file_path = os.path.join(config.VIOLATION_IMG_DIR, filename)
-                    if os.path.isfile(file_path): os.unlink(file_path)
                 messagebox.showinfo("Başarılı", "Tüm loglar ve ihlal fotoğrafları başarıyla temizlendi.")
             except Exception as e: messagebox.showerror("Hata", f"Loglar temizlenirken bir hata oluştu: {e}")
     
@@ -285,43 +340,37 @@ class HardHatApp(tk.Tk):
         return f"Tarih: {dt_obj.day} {month_name} {dt_obj.year}, Saat: {dt_obj.strftime('%H:%M:%S')}"
 
     def filter_logs(self, days=None):
-        self.ui.log_listbox.delete(0, tk.END)
-        self.log_map.clear()
-        
-        cutoff_date = None
+        self.current_filter_days = days
+        self.log_cutoff_date = None
         if days is not None:
-            cutoff_date = datetime.datetime.now() - datetime.timedelta(days=days)
-            
-        filtered_logs = [log for log in self.all_logs if cutoff_date is None or log[0] > cutoff_date]
-            
-        for dt_obj, path in filtered_logs:
-            display_str = self.format_datetime_for_display(dt_obj)
-            self.ui.log_listbox.insert(tk.END, display_str)
-            self.log_map[display_str] = path
-            
+            self.log_cutoff_date = datetime.datetime.now() - datetime.timedelta(days=days)
+        
+        self.ui.log_list.reload()
         self.update_log_count()
 
+    def fetch_log_rows(self, offset, limit):
+        return self.store.query(since=self.log_cutoff_date, limit=limit, offset=offset)
+
+    def count_log_rows(self):
+        return self.store.count(since=self.log_cutoff_date)
+
+    def format_log_row(self, record):
+        display_str = self.format_datetime_for_display(record.timestamp)
+        if record.camera_id is not None:
+            display_str = f"{display_str} | Kamera {record.camera_id}"
+        return display_str
+
     def update_log_count(self):
-        count = self.ui.log_listbox.size()
+        count = self.ui.log_list.total
         self.log_count_var.set(f"Görüntülenen Kayıt: {count}")
             
-    def load_logs_from_disk(self):
-        if not os.path.exists(config.LOG_FILE_PATH): return
-        
-        with open(config.LOG_FILE_PATH, "r", encoding="utf-8") as f:
-            for line in f:
-                if "|" in line:
-                    try:
-                        timestamp_str, image_path = line.strip().split("|")
-                        dt_obj = datetime.datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f")
-                        if os.path.exists(image_path):
-                            self.all_logs.append((dt_obj, image_path))
-                    except (ValueError, IndexError):
-                        print(f"Hatalı log satırı atlanıyor: {line.strip()}")
-                        continue
-        
-        self.all_logs.sort(key=lambda x: x[0], reverse=True)
-        self.filter_logs()
+    def import_legacy_logs(self):
+        #eski metin logu arka planda aktarilir; liste, aktarim bitince None isaretiyle yenilenir
+        with STARTUP.phase("log_import"):
+            imported = self.store.import_log_file(config.LOG_FILE_PATH)
+        if imported:
+            print(f"{imported} eski log kaydı veritabanına aktarıldı.")
+            self.log_queue.put(None)
     
     def select_video_file(self):
         path = filedialog.askopenfilename(filetypes=[("Video Dosyaları", "*.mp4 *.avi *.mov *.mkv")])
@@ -330,69 +379,96 @@ class HardHatApp(tk.Tk):
     def start_camera(self):
         self.start_processing_loop(0)
         
-    def update_image_display(self, cv2_image):
-        container_w = self.ui.image_label.winfo_width()
-        container_h = self.ui.image_label.winfo_height()
-        if container_h > 1 and container_w > 1:
-            img_h, img_w, _ = cv2_image.shape
-            scale = min(container_w / img_w, container_h / img_h)
-            if scale < 1.0: 
-                resized_image = cv2.resize(cv2_image, (int(img_w * scale), int(img_h * scale)), interpolation=cv2.INTER_AREA)
-            else: 
-                resized_image = cv2_image
-            img_rgb = cv2.cvtColor(resized_image, cv2.COLOR_BGR2RGB)
-            tk_img = ImageTk.PhotoImage(image=Image.fromarray(img_rgb))
-            self.ui.image_label.config(image=tk_img)
-            self.ui.image_label.image = tk_img
+    def update_image_display(self, cv2_image, overlay=()):
+        with METRICS.stage("display_convert"):
+            self.renderer.render(cv2_image, overlay)
             
     def show_violation_in_new_window(self, event):
         selected_indices = self.ui.log_listbox.curselection()
         if not selected_indices: return
         
-        log_entry_key = self.ui.log_listbox.get(selected_indices[0])
-        image_path = self.log_map.get(log_entry_key)
+        record = self.ui.log_list.record_at(selected_indices[0])
+        if record is None: return
+        image_path = record.image_path
         
         if not image_path or not os.path.exists(image_path):
             messagebox.showwarning("Uyarı", f"Görüntü dosyası bulunamadı:\n{image_path}")
             return
-        
-        violation_window = tk.Toplevel(self)
-        violation_window.title(f"İhlal Anı: {log_entry_key}")
 
+        max_size = (int(self.winfo_screenwidth() * 0.8), int(self.winfo_screenheight() * 0.8))
+        self.viewer_record = record
         try:
-            img = cv2.imread(image_path)
-            img_h, img_w, _ = img.shape
-
-            screen_w = self.winfo_screenwidth()
-            screen_h = self.winfo_screenheight()
-            max_w = int(screen_w * 0.8)
-            max_h = int(screen_h * 0.8)
+            preview = self.preview_cache.peek(image_path, max_size)
+            thumb_path = thumbnail_path(image_path)
+            if preview is None and os.path.exists(thumb_path):
+                #once kucuk resim gosterilir, tam goruntu bos zamanda cozulur
+                self.show_violation_preview(record, load_preview(thumb_path, max_size))
+                self.after_idle(self.load_full_preview, record, max_size)
+                return
+            if preview is None:
+                preview = self.preview_cache.get(image_path, max_size)
+            self.show_violation_preview(record, preview)
+        except Exception as e:
+            messagebox.showerror("Görüntü Hatası", f"Görüntü yüklenirken bir hata oluştu: {e}")
 
-            scale = min(max_w / img_w, max_h / img_h)
-            new_w = int(img_w * scale)
-            new_h = int(img_h * scale)
-            
-            resized_image = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_AREA)
+    def load_full_preview(self, record, max_size):
+        #bu arada baska bir kayit secildiyse eski goruntu gosterilmez
+        if self.viewer_record is not record:
+            return
+        try:
+            self.show_violation_preview(record, self.preview_cache.get(record.image_path, max_size))
+        except Exception as e:
+            messagebox.showerror("Görüntü Hatası", f"Görüntü yüklenirken bir hata oluştu: {e}")
 
-            img_rgb = cv2.cvtColor(resized_image, cv2.COLOR_BGR2RGB)
-            pil_img = Image.fromarray(img_rgb)
-            tk_img = ImageTk.PhotoImage(image=pil_img)
+    def show_violation_preview(self, record, preview):
+        #tek bir goruntuleme penceresi acik tutulur ve her secimde icerigi guncellenir
+        if self.viewer_window is None or not self.viewer_window.winfo_exists():
+            self.viewer_window = tk.Toplevel(self)
+            self.viewer_window.resizable(False, False)
+            self.viewer_label = ttk.Label(self.viewer_window)
+            self.viewer_label.pack()
+            self.viewer_clip_button = ttk.Button(self.viewer_window, text="Klibi Oynat",
+                                                 command=lambda: self.play_clip(self.viewer_record.clip_path))
+        self.viewer_window.title(f"İhlal Anı: {self.format_log_row(record)}")
+
+        from PIL import ImageTk
+
+        tk_img = ImageTk.PhotoImage(image=preview)
+        self.viewer_label.config(image=tk_img)
+        self.viewer_label.image = tk_img
+
+        new_w, window_h = preview.size
+        if record.clip_path and os.path.exists(record.clip_path):
+            self.viewer_clip_button.pack(fill=tk.X)
+            window_h += 40
+        else:
+            self.viewer_clip_button.pack_forget()
 
-            img_label = ttk.Label(violation_window, image=tk_img)
-            img_label.pack()
-            img_label.image = tk_img 
-            
-            pos_x = (screen_w // 2) - (new_w // 2)
-            pos_y = (screen_h // 2) - (new_h // 2)
-            violation_window.geometry(f"{new_w}x{new_h}+{pos_x}+{pos_y}")
-            violation_window.resizable(False, False)
+        pos_x = (self.winfo_screenwidth() // 2) - (new_w // 2)
+        pos_y = (self.winfo_screenheight() // 2) - (window_h // 2)
+        self.viewer_window.geometry(f"{new_w}x{window_h}+{pos_x}+{pos_y}")
 
+    def play_clip(self, clip_path):
+        try:
+            if hasattr(os, "startfile"):
+                os.startfile(clip_path)
+            else:
+                subprocess.Popen(["open" if sys.platform == "darwin" else "xdg-open", clip_path])
         except Exception as e:
-            violation_window.destroy()
-            messagebox.showerror("Görüntü Hatası", f"Görüntü yüklenirken bir hata oluştu: {e}")
-            
+            messagebox.showerror("Klip Hatası", f"Klip açılamadı: {e}")
+
     def on_closing(self):
+        if self.clip_recorder:
+            self.clip_recorder.stop()
         self.stop_processing()
+        if self.inference_pool:
+            self.inference_pool.stop()
+        self.retention.stop()
+        self.violation_writer.close()
+        self.alerts.stop()
+        if self.uploader:
+            self.uploader.stop()
+        self.store.close()
         self.destroy()
 
 if __name__ == "__main__":
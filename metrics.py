@@ -0,0 +1,204 @@
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+METRIC_PREFIX = "hardhat"
+
+
+class NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class StageTimer:
+    __slots__ = ("metrics", "key", "start")
+
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe_key(self.key, time.perf_counter() - self.start)
+        return False
+
+
+def labels_key(name, camera):
+    return (name, None if camera is None else str(camera))
+
+
+class Metrics:
+    #asama sureleri, sayaclar ve gostergeler; kapaliyken her cagri tek bir bayrak kontrolunden ibarettir
+    def __init__(self, enabled=config.METRICS_ENABLED):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self.server = None
+        self.log_thread = None
+        self.log_stop_event = threading.Event()
+
+    def enable(self):
+        self.enabled = True
+
+    def stage(self, name, camera=None):
+        if not self.enabled:
+            return NULL_TIMER
+        return StageTimer(self, labels_key(name, camera))
+
+    def observe(self, name, seconds, camera=None):
+        if self.enabled:
+            self.observe_key(labels_key(name, camera), seconds)
+
+    def observe_key(self, key, seconds):
+        with self.lock:
+            count, total, maximum = self.stages.get(key, (0, 0.0, 0.0))
+            self.stages[key] = (count + 1, total + seconds, max(maximum, seconds))
+
+    def inc(self, name, value=1, camera=None):
+        if not self.enabled:
+            return
+        key = labels_key(name, camera)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, camera=None):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.gauges[labels_key(name, camera)] = value
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stages), dict(self.counters), dict(self.gauges)
+
+    def render_prometheus(self):
+        stages, counters, gauges = self.snapshot()
+
+        def fmt_labels(camera, **extra):
+            labels = dict(extra)
+            if camera is not None:
+                labels["camera"] = camera
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+        lines = [f"# TYPE {METRIC_PREFIX}_stage_seconds summary"]
+        for (name, camera), (count, total, maximum) in sorted(stages.items(), key=str):
+            lines.append(f"{METRIC_PREFIX}_stage_seconds_sum{fmt_labels(camera, stage=name)} {total:.6f}")
+            lines.append(f"{METRIC_PREFIX}_stage_seconds_count{fmt_labels(camera, stage=name)} {count}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_stage_seconds_max gauge")
+        for (name, camera), (count, total, maximum) in sorted(stages.items(), key=str):
+            lines.append(f"{METRIC_PREFIX}_stage_seconds_max{fmt_labels(camera, stage=name)} {maximum:.6f}")
+        for values, suffix, metric_type in ((counters, "_total", "counter"), (gauges, "", "gauge")):
+            last_name = None
+            for (name, camera), value in sorted(values.items(), key=str):
+                if name != last_name:
+                    lines.append(f"# TYPE {METRIC_PREFIX}_{name}{suffix} {metric_type}")
+                    last_name = name
+                lines.append(f"{METRIC_PREFIX}_{name}{suffix}{fmt_labels(camera)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self):
+        stages, counters, gauges = self.snapshot()
+        parts = []
+        for (name, camera), (count, total, maximum) in sorted(stages.items(), key=str):
+            label = f"{name}[{camera}]" if camera is not None else name
+            parts.append(f"{label}: ort {total / count * 1000:.1f} ms, maks {maximum * 1000:.1f} ms")
+        for (name, camera), value in sorted(list(counters.items()) + list(gauges.items()), key=str):
+            label = f"{name}[{camera}]" if camera is not None else name
+            parts.append(f"{label}={value:.3f}" if isinstance(value, float) else f"{label}={value}")
+        return " | ".join(parts)
+
+    def serve(self, port=config.METRICS_HTTP_PORT, host=config.METRICS_HTTP_HOST):
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.enable()
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server
+
+    def start_periodic_log(self, interval=config.METRICS_LOG_INTERVAL_SECONDS):
+        self.enable()
+        self.log_stop_event.clear()
+
+        def log_loop():
+            while not self.log_stop_event.wait(interval):
+                print(f"[metrikler] {self.format_summary()}")
+
+        self.log_thread = threading.Thread(target=log_loop, daemon=True)
+        self.log_thread.start()
+
+    def shutdown(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        self.server = None
+        self.log_stop_event.set()
+
+
+METRICS = Metrics()
+
+
+class StartupProfile:
+    #acilis asamalarinin sureleri; metrikler kapaliyken de tutulur, acilis bitince tek satir olarak yazdirilir
+    def __init__(self, started_at=None):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.phases = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.phases.append((name, seconds))
+        METRICS.set_gauge(f"startup_{name}_seconds", seconds)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    def format_summary(self):
+        with self.lock:
+            parts = [f"{name} {seconds:.2f} sn" for name, seconds in self.phases]
+        parts.append(f"toplam {self.elapsed():.2f} sn")
+        return " | ".join(parts)
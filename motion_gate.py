@@ -0,0 +1,63 @@
+import time
+
+import cv2
+import numpy as np
+
+import config
+from metrics import METRICS
+
+
+class MotionGate:
+    #kucultulmus gri karede arka plan farki; hareket yoksa ve son cikarimda tespit yoksa model atlanir
+    def __init__(self, width=config.MOTION_FRAME_WIDTH, pixel_threshold=config.MOTION_PIXEL_THRESHOLD,
+                 min_area_ratio=config.MOTION_MIN_AREA_RATIO, background_rate=config.MOTION_BACKGROUND_RATE,
+                 hold_seconds=config.MOTION_HOLD_SECONDS, keyframe_interval=config.MOTION_KEYFRAME_INTERVAL_SECONDS, name=None):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_area_ratio = min_area_ratio
+        self.background_rate = background_rate
+        self.hold_seconds = hold_seconds
+        self.keyframe_interval = keyframe_interval
+        self.name = name
+
+        self.background = None
+        self.motion_ratio = 0.0
+        self.has_detections = True
+        self.last_active = float("-inf")
+        self.last_inference = float("-inf")
+        self.frames_gated = 0
+
+    def detect_motion(self, image):
+        height, width = image.shape[:2]
+        small = cv2.resize(image, (self.width, max(1, round(height * self.width / width))), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        self.motion_ratio = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+        cv2.accumulateWeighted(gray, self.background, self.background_rate)
+        return self.motion_ratio >= self.min_area_ratio
+
+    def should_infer(self, image, now=None):
+        #hareketin goruldugu kare atlanmaz; tespit varken ya da anahtar kare zamani geldiginde model her zaman calisir
+        now = time.monotonic() if now is None else now
+        if self.detect_motion(image):
+            self.last_active = now
+        if self.has_detections or now - self.last_active < self.hold_seconds or now - self.last_inference >= self.keyframe_interval:
+            self.last_inference = now
+            return True
+        self.frames_gated += 1
+        METRICS.inc("frames_gated", camera=self.name)
+        return False
+
+    def update(self, detection_count, now=None):
+        self.has_detections = detection_count > 0
+        if self.has_detections:
+            self.last_active = time.monotonic() if now is None else now
+
+    def reset(self):
+        self.background = None
+        self.has_detections = True
+        self.last_active = float("-inf")
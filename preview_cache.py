@@ -0,0 +1,44 @@
+from collections import OrderedDict
+
+from PIL import Image
+
+import config
+
+
+def load_preview(path, max_size):
+    #JPEG, hedef boyuta en yakin olcekte cozulur (DCT olcekleme); tam cozunurluklu kare hic olusturulmaz
+    with Image.open(path) as image:
+        image.draft("RGB", max_size)
+        image = image.convert("RGB")
+    img_w, img_h = image.size
+    scale = min(max_size[0] / img_w, max_size[1] / img_h)
+    size = (max(1, int(img_w * scale)), max(1, int(img_h * scale)))
+    if size != image.size:
+        image = image.resize(size, Image.BILINEAR)
+    return image
+
+
+class PreviewCache:
+    #cozulmus ve ekrana sigdirilmis onizlemeler icin LRU onbellek
+    def __init__(self, capacity=config.PREVIEW_CACHE_SIZE):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def peek(self, path, max_size):
+        key = (path, max_size)
+        image = self.items.get(key)
+        if image is not None:
+            self.items.move_to_end(key)
+        return image
+
+    def get(self, path, max_size):
+        image = self.peek(path, max_size)
+        if image is None:
+            image = load_preview(path, max_size)
+            self.items[(path, max_size)] = image
+            while len(self.items) > self.capacity:
+                self.items.popitem(last=False)
+        return image
+
+    def clear(self):
+        self.items.clear()
@@ -0,0 +1,181 @@
+import datetime
+import glob
+import os
+import shutil
+import threading
+import time
+
+import config
+from metrics import METRICS
+
+TRASH_SUFFIX = ".deleting-"
+
+
+def shard_dir(base_dir, timestamp):
+    #medya dosyalari gun gun klasorlenir: <kok>/YYYY/MM/DD
+    return os.path.join(base_dir, timestamp.strftime("%Y"), timestamp.strftime("%m"), timestamp.strftime("%d"))
+
+
+def thumbnail_path(image_path):
+    stem, ext = os.path.splitext(image_path)
+    return f"{stem}_thumb{ext}"
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def remove_file(path):
+    try:
+        size = os.path.getsize(path)
+        os.unlink(path)
+        return size
+    except OSError:
+        return 0
+
+
+def prune_empty_dirs(base_dir):
+    for root, dirs, names in os.walk(base_dir, topdown=False):
+        if root != base_dir and not dirs and not names:
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+
+
+class RetentionManager:
+    #yas ve disk kotasini arka planda uygular; en eski kayitlar dosyalariyla birlikte silinir
+    def __init__(self, store, media_dirs=(config.VIOLATION_IMG_DIR, config.VIOLATION_CLIP_DIR), max_age_days=config.RETENTION_MAX_AGE_DAYS,
+                 max_disk_mb=config.RETENTION_MAX_DISK_MB, interval=config.RETENTION_CHECK_INTERVAL_SECONDS, on_purged=None):
+        self.store = store
+        self.media_dirs = media_dirs
+        self.max_age_days = max_age_days
+        self.max_bytes = max_disk_mb * 1024 * 1024 if max_disk_mb else None
+        self.interval = interval
+        self.on_purged = on_purged
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.records_purged = 0
+        self.bytes_freed = 0
+        self.last_usage = 0
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1)
+        self.thread = None
+
+    def backfill_sizes(self):
+        #boyutu kaydedilmemis eski kayitlar icin dosyalara bir kez bakilir; sonraki kontroller sadece veritabanini okur
+        filled = 0
+        while not self.stop_event.is_set():
+            rows = self.store.missing_sizes(config.RETENTION_DELETE_BATCH_SIZE)
+            if not rows:
+                break
+            self.store.set_sizes([(record_id, file_size(image_path) + file_size(thumbnail_path(image_path)),
+                                   file_size(clip_path) if clip_path else None)
+                                  for record_id, image_path, clip_path in rows])
+            filled += len(rows)
+        return filled
+
+    def run(self):
+        self.remove_trash()
+        self.backfill_sizes()
+        while True:
+            try:
+                self.enforce()
+            except Exception as e:
+                print(f"Saklama politikası uygulanırken hata: {e}")
+            if self.stop_event.wait(self.interval):
+                break
+
+    def disk_usage(self):
+        #sadece kayitlarin gosterdigi dosyalar sayilir; kayitsiz dosyalar (eski goruntuler, yarim kalan .tmp'ler)
+        #hicbir kayit silinerek kucultulemeyecegi icin kotaya dahil edilmez. Boyutlar yazim aninda kaydedilir, dosyalara bakilmaz
+        return self.store.media_usage()
+
+    def delete_records(self, records):
+        self.store.delete([record.id for record in records])
+        freed = 0
+        for record in records:
+            if record.image_path:
+                freed += remove_file(record.image_path) + remove_file(thumbnail_path(record.image_path))
+        for clip_path in {record.clip_path for record in records if record.clip_path}:
+            if not self.store.clip_referenced(clip_path):
+                freed += remove_file(clip_path)
+        return freed
+
+    def enforce(self, now=None):
+        now = datetime.datetime.now() if now is None else now
+        purged = 0
+        freed = 0
+        with self.lock:
+            if self.max_age_days:
+                cutoff = now - datetime.timedelta(days=self.max_age_days)
+                while not self.stop_event.is_set():
+                    records = self.store.oldest(config.RETENTION_DELETE_BATCH_SIZE, until=cutoff)
+                    if not records:
+                        break
+                    freed += self.delete_records(records)
+                    purged += len(records)
+
+            usage = self.disk_usage()
+            if self.max_bytes:
+                while usage > self.max_bytes and not self.stop_event.is_set():
+                    records = self.store.oldest(config.RETENTION_DELETE_BATCH_SIZE)
+                    if not records:
+                        break
+                    #kotanin altina inmeye yetecek kadar en eski kayit silinir
+                    excess = usage - self.max_bytes
+                    for count, record in enumerate(records, 1):
+                        excess -= record.media_bytes or 0
+                        if excess <= 0:
+                            records = records[:count]
+                            break
+                    freed += self.delete_records(records)
+                    purged += len(records)
+                    usage = self.disk_usage()
+
+            if purged:
+                for path in self.media_dirs:
+                    prune_empty_dirs(path)
+            self.records_purged += purged
+            self.bytes_freed += freed
+            self.last_usage = usage
+        METRICS.set_gauge("media_disk_bytes", usage)
+        if purged:
+            METRICS.inc("violations_purged", purged)
+            if self.on_purged:
+                self.on_purged(purged)
+        return purged
+
+    def clear_all(self):
+        #klasorler aninda kenara alinir, silme arka planda yapilir
+        with self.lock:
+            self.store.clear()
+            for path in self.media_dirs:
+                if os.path.isdir(path):
+                    os.replace(path, f"{path}{TRASH_SUFFIX}{int(time.time() * 1000)}")
+                os.makedirs(path, exist_ok=True)
+        threading.Thread(target=self.remove_trash, daemon=True).start()
+
+    def remove_trash(self):
+        for path in self.media_dirs:
+            for trash in glob.glob(f"{glob.escape(path)}{TRASH_SUFFIX}*"):
+                shutil.rmtree(trash, ignore_errors=True)
+
+    def stats(self):
+        return {
+            "disk_usage_mb": self.last_usage / (1024 * 1024),
+            "records_purged": self.records_purged,
+            "bytes_freed_mb": self.bytes_freed / (1024 * 1024),
+        }
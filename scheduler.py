@@ -0,0 +1,151 @@
+import time
+
+import cv2
+import numpy as np
+
+import config
+from metrics import METRICS
+from motion_gate import MotionGate
+
+
+def roi_points(roi, width, height):
+    points = np.asarray(roi, dtype=np.float64).reshape(-1, 2)
+    if (points <= 1.0).all():
+        points = points * (width, height)
+    points = np.round(points).astype(np.int32)
+    points[:, 0] = np.clip(points[:, 0], 0, width)
+    points[:, 1] = np.clip(points[:, 1], 0, height)
+    return points
+
+
+class RegionOfInterest:
+    #kare sadece calisma alanina kirpilir; poligon disindaki pikseller karartilir
+    def __init__(self, roi):
+        self.roi = roi
+        self.shape = None
+        self.bounds = None
+        self.mask = None
+
+    def prepare(self, shape):
+        height, width = shape[:2]
+        points = roi_points(self.roi, width, height)
+        x1, y1 = points.min(axis=0)
+        x2, y2 = points.max(axis=0)
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError(f"Geçersiz ilgi alanı: {self.roi}")
+        self.bounds = (int(x1), int(y1), int(x2), int(y2))
+        self.mask = None
+        if len(points) > 2:
+            self.mask = np.zeros((y2 - y1, x2 - x1), dtype=np.uint8)
+            cv2.fillPoly(self.mask, [points - (x1, y1)], 255)
+        self.shape = shape
+
+    def crop(self, image):
+        if image.shape != self.shape:
+            self.prepare(image.shape)
+        x1, y1, x2, y2 = self.bounds
+        cropped = image[y1:y2, x1:x2]
+        if self.mask is not None:
+            cropped = cv2.bitwise_and(cropped, cropped, mask=self.mask)
+        return cropped
+
+    def to_frame(self, boxes):
+        x1, y1 = self.bounds[:2]
+        return boxes + np.array((x1, y1, x1, y1), dtype=boxes.dtype)
+
+
+class InferenceScheduler:
+    #kamera basina hedef FPS; sadece yeni kareler islenir, yuk altinda cikarim boyutu ve kare atlama ayarlanir
+    def __init__(self, target_fps=config.SCHEDULER_TARGET_FPS, image_sizes=config.SCHEDULER_IMAGE_SIZES,
+                 max_stride=config.SCHEDULER_MAX_STRIDE, roi=None, adaptive=True, motion_gate=config.MOTION_GATE_ENABLED, name=None):
+        self.target_fps = target_fps
+        self.frame_budget = 1.0 / target_fps if target_fps else 0.0
+        self.image_sizes = tuple(image_sizes)
+        self.max_stride = max_stride
+        self.adaptive = adaptive
+        self.name = name
+        self.roi = RegionOfInterest(roi) if roi else None
+        self.motion_gate = MotionGate(name=name) if motion_gate else None
+
+        self.level = 0
+        self.stride = 1
+        self.last_seq = -1
+        self.new_frames = 0
+        self.next_due = 0.0
+        self.avg_latency = 0.0
+        self.last_adjust = time.monotonic()
+        self.frames_admitted = 0
+        self.frames_skipped = 0
+
+    @property
+    def imgsz(self):
+        return self.image_sizes[self.level]
+
+    def admit(self, frame, now=None):
+        #ayni kare ikinci kez islenmez; stride'a ya da hedef FPS'e uymayan yeni kareler atlanir
+        if frame.seq <= self.last_seq:
+            return False
+        self.last_seq = frame.seq
+        self.new_frames += 1
+        now = time.monotonic() if now is None else now
+        if self.new_frames % self.stride or now < self.next_due:
+            self.frames_skipped += 1
+            METRICS.inc("frames_skipped", camera=self.name)
+            return False
+        self.next_due = max(self.next_due, now - self.frame_budget) + self.frame_budget
+        self.frames_admitted += 1
+        return True
+
+    def crop(self, image):
+        return self.roi.crop(image) if self.roi else image
+
+    def to_frame(self, boxes):
+        return self.roi.to_frame(boxes) if self.roi else boxes
+
+    def wants_inference(self, model_input, now=None):
+        #hareket kapisi ROI'ye kirpilmis karede calisir; alan disindaki hareket modeli uyandirmaz
+        return self.motion_gate is None or self.motion_gate.should_infer(model_input, now)
+
+    def observe(self, detection_count, now=None):
+        if self.motion_gate:
+            self.motion_gate.update(detection_count, now)
+
+    def record(self, latency, now=None):
+        self.avg_latency = latency if not self.avg_latency else 0.8 * self.avg_latency + 0.2 * latency
+        if not self.adaptive or not self.frame_budget:
+            return
+        now = time.monotonic() if now is None else now
+        if now - self.last_adjust < config.SCHEDULER_ADJUST_INTERVAL_SECONDS:
+            return
+        self.last_adjust = now
+
+        load = self.avg_latency / (self.frame_budget * self.stride)
+        if load > config.SCHEDULER_LOAD_HIGH:
+            self.degrade()
+        elif load < config.SCHEDULER_LOAD_LOW:
+            self.recover()
+        METRICS.set_gauge("inference_image_size", self.imgsz, camera=self.name)
+        METRICS.set_gauge("inference_stride", self.stride, camera=self.name)
+
+    def degrade(self):
+        if self.level < len(self.image_sizes) - 1:
+            self.level += 1
+        elif self.stride < self.max_stride:
+            self.stride += 1
+
+    def recover(self):
+        #dogruluk icin once atlanan kareler, sonra cikarim boyutu geri alinir
+        if self.stride > 1:
+            self.stride -= 1
+        elif self.level > 0:
+            self.level -= 1
+
+    def stats(self):
+        return {
+            "imgsz": self.imgsz,
+            "stride": self.stride,
+            "avg_latency_ms": self.avg_latency * 1000,
+            "frames_admitted": self.frames_admitted,
+            "frames_skipped": self.frames_skipped,
+            "frames_gated": self.motion_gate.frames_gated if self.motion_gate else 0,
+        }
@@ -0,0 +1,16 @@
+import threading
+
+
+class Setting:
+    #tk degiskenlerinin (DoubleVar, BooleanVar) thread-safe karsiligi
+    def __init__(self, value):
+        self._value = value
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            return self._value
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
@@ -0,0 +1,353 @@
+import threading
+import time
+import traceback
+from queue import Queue
+
+import config
+from settings import Setting
+from capture import CaptureSource
+from clip_recorder import ClipRecorder
+from video_processor import VideoProcessor, publish_violation, EMPTY_DETECTIONS
+from scheduler import InferenceScheduler
+from violation_writer import ViolationWriter
+from violation_store import ViolationStore
+from retention import RetentionManager
+from zone_index import CooldownZoneIndex
+from track_state import ViolationTracks
+from metrics import METRICS
+from inference_backends import load_inference_model, warm_up
+from inference_workers import InferenceWorkerPool, EMPTY_TRACKS, WorkerError
+from alerts import AlertDispatcher, build_sinks
+from uploader import ViolationUploader
+
+
+def create_tracker(tracker_config=config.TRACKER_CONFIG, frame_rate=config.TRACKER_FRAME_RATE):
+    #ultralytics ancak ilk tracker olusturulurken yuklenir; worker surecleri ve motorun acilisi bu maliyeti beklemez
+    from ultralytics.trackers.track import TRACKER_MAP
+    from ultralytics.utils import IterableSimpleNamespace
+    from ultralytics.utils.checks import check_yaml
+
+    try:
+        from ultralytics.utils import YAML
+        load_yaml = YAML.load
+    except ImportError:
+        from ultralytics.utils import yaml_load as load_yaml
+
+    cfg = IterableSimpleNamespace(**load_yaml(check_yaml(tracker_config)))
+    return TRACKER_MAP[cfg.tracker_type](args=cfg, frame_rate=frame_rate)
+
+
+class CameraStream:
+    #her kamera kendi tracker'ini, loglanan id'lerini ve cooldown bolgelerini tutar
+    def __init__(self, engine, camera_id, source, roi=None):
+        self.camera_id = camera_id
+        self.source = source
+        self.model = engine.model
+        self.stop_event = engine.stop_event
+        self.log_queue = engine.log_queue
+        self.confidence_var = engine.confidence_var
+        self.show_boxes_var = engine.show_boxes_var
+        self.violation_writer = engine.violation_writer
+
+        self.capture = CaptureSource(source, name=camera_id)
+        self.scheduler = InferenceScheduler(target_fps=engine.target_fps, roi=roi, name=camera_id)
+        self.clip_recorder = ClipRecorder(self.capture, camera_id, engine.store) if config.CLIP_RECORDING_ENABLED else None
+        self.processing_captured_at = None
+        #worker modunda tracker, kameranin atandigi worker surecinde tutulur
+        self.tracker = create_tracker(engine.tracker_config) if engine.pool is None else None
+        self.pending = {}
+        self.violation_tracks = ViolationTracks()
+        self.recent_log_zones = CooldownZoneIndex()
+        self.latest_results_for_drawing = EMPTY_DETECTIONS
+        self.latest_results_captured_at = None
+        self.results_lock = threading.Lock()
+
+        self.frames_processed = 0
+        self.started_at = None
+        self.processor = VideoProcessor(self, camera_id)
+
+    def open(self):
+        self.started_at = time.time()
+        if not self.capture.start():
+            return False
+        if self.clip_recorder:
+            self.clip_recorder.start()
+        return True
+
+    def read(self):
+        #sadece zamanlayicinin kabul ettigi ve hareket kapisindan gecen yeni kareler dondurulur: (kare, model girdisi)
+        captured = self.capture.ring.latest(self.scheduler.last_seq)
+        if captured is None or not self.scheduler.admit(captured):
+            return None
+        model_input = self.scheduler.crop(captured.image)
+        if not self.scheduler.wants_inference(model_input):
+            self.processor.advance_tracks(captured.image)
+            with self.results_lock:
+                self.latest_results_captured_at = captured.captured_at
+            return None
+        self.processing_captured_at = captured.captured_at
+        return captured.image, model_input
+
+    def is_finished(self):
+        return self.capture.is_finished() and self.capture.ring.latest(self.scheduler.last_seq) is None
+
+    def release(self, wait=False):
+        #wait=False: bekleyen klipler motor dongusunu durdurmadan arka planda yazilir
+        self.processor.finish_tracks()
+        if self.clip_recorder:
+            self.clip_recorder.stop(timeout=5 if wait else 0)
+        self.capture.stop()
+
+    def update(self, frame, model_input, result):
+        #tracker kirpilmis karede calisir; kutular kaydedilmeden once tam kare koordinatlarina tasinir
+        det = result.boxes.cpu().numpy()
+        tracks = EMPTY_TRACKS
+        if len(det):
+            with METRICS.stage("tracking", self.camera_id):
+                tracks = self.tracker.update(det, model_input)
+        self.apply_tracks(frame, tracks, len(det), self.processing_captured_at)
+
+    def apply_tracks(self, frame, tracks, detection_count, captured_at):
+        #izler (x1, y1, x2, y2, id, conf, cls) kirpilmis kare koordinatindadir
+        self.scheduler.observe(detection_count)
+        with METRICS.stage("postprocess", self.camera_id):
+            current_results_data = self.processor.process_detections(
+                frame, self.scheduler.to_frame(tracks[:, :4]), tracks[:, 4], tracks[:, 5], tracks[:, 6])
+        with self.results_lock:
+            self.latest_results_for_drawing = current_results_data
+            self.latest_results_captured_at = captured_at
+        self.frames_processed += 1
+        METRICS.inc("frames_processed", camera=self.camera_id)
+        METRICS.set_gauge("inference_staleness_seconds", time.time() - captured_at, camera=self.camera_id)
+
+    def fps(self):
+        if not self.started_at:
+            return 0.0
+        elapsed = time.time() - self.started_at
+        return self.frames_processed / elapsed if elapsed > 0 else 0.0
+
+
+class StreamEngine:
+    #tek model, N kaynak: her turda tum kaynaklardan son kare alinip tek batch ile islenir
+    #workers > 0 ise kameralar worker sureclerine dagitilir ve cikarim GIL disinda yapilir
+    def __init__(self, model_path=config.MODEL_PATH, tracker_config=config.TRACKER_CONFIG, max_batch_size=config.ENGINE_MAX_BATCH_SIZE,
+                 confidence=config.DEFAULT_CONFIDENCE, show_boxes=True, db_path=config.DB_PATH,
+                 backend=config.INFERENCE_BACKEND, int8=config.INFERENCE_INT8, threads=config.INFERENCE_THREADS,
+                 target_fps=config.SCHEDULER_TARGET_FPS, workers=config.INFERENCE_WORKERS, alert_sinks=None,
+                 upload_url=config.UPLOAD_URL, site_id=config.UPLOAD_SITE_ID, upload_token=config.UPLOAD_TOKEN):
+        if workers > 0:
+            self.model = None
+            self.pool = InferenceWorkerPool(workers, model_path, backend, int8, threads, tracker_config, max_batch_size=max_batch_size)
+            self.pool.start()
+        else:
+            self.model = load_inference_model(model_path, backend, int8, threads)
+            warm_up(self.model)
+            self.pool = None
+        self.tracker_config = tracker_config
+        self.target_fps = target_fps
+        self.max_batch_size = max_batch_size
+
+        self.streams = {}
+        self.streams_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.log_queue = Queue()
+        #alert_sinks verilmezse uyarilar konsola yazilir
+        self.alerts = AlertDispatcher(build_sinks(desktop=False, console=True) if alert_sinks is None else alert_sinks)
+        self.confidence_var = Setting(confidence)
+        self.show_boxes_var = Setting(show_boxes)
+        self.store = ViolationStore(db_path)
+        self.violation_writer = ViolationWriter(self.store, on_written=lambda event, save_path: publish_violation(self, event, save_path))
+        self.retention = RetentionManager(self.store)
+        self.uploader = ViolationUploader(self.store, upload_url, site_id, upload_token) if upload_url else None
+
+        self.processing_thread = None
+        self.error = None
+        self.consecutive_errors = 0
+        self.batches_processed = 0
+        self.last_batch_latency = 0.0
+
+    def add_source(self, camera_id, source, roi=None):
+        roi = config.CAMERA_ROIS.get(camera_id) if roi is None else roi
+        stream = CameraStream(self, camera_id, source, roi)
+        if not stream.open():
+            stream.release()
+            raise ValueError(f"Kaynak açılamadı: {source}")
+        with self.streams_lock:
+            old_stream = self.streams.pop(camera_id, None)
+            self.streams[camera_id] = stream
+        if old_stream:
+            old_stream.release()
+            if self.pool:
+                self.pool.unregister(camera_id)
+        return stream
+
+    def remove_source(self, camera_id):
+        with self.streams_lock:
+            stream = self.streams.pop(camera_id, None)
+        if stream:
+            stream.release()
+            if self.pool:
+                self.pool.unregister(camera_id)
+
+    def start(self):
+        self.stop_event.clear()
+        self.alerts.start()
+        self.violation_writer.start()
+        self.retention.start()
+        if self.uploader:
+            self.uploader.start()
+        self.processing_thread = threading.Thread(target=self.run, daemon=True)
+        self.processing_thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.processing_thread and self.processing_thread.is_alive():
+            self.processing_thread.join(timeout=1)
+        self.processing_thread = None
+        with self.streams_lock:
+            streams = list(self.streams.values())
+            self.streams.clear()
+        for stream in streams:
+            stream.release(wait=True)
+        if self.pool:
+            self.pool.stop()
+        self.retention.stop()
+        self.violation_writer.close()
+        self.alerts.stop()
+        if self.uploader:
+            self.uploader.stop()
+
+    def run(self):
+        #beklenmeyen hata thread'i sessizce bitirmez; self.error ayarlanir, headless sifirdan farkli kodla cikar
+        try:
+            if self.pool:
+                self.run_with_workers()
+            else:
+                self.run_batches()
+        except Exception as e:
+            traceback.print_exc()
+            print(f"Hata: İşleme durduruldu: {e}")
+            self.error = e
+
+    def batch_failed(self, error):
+        #hatali batch atlanir; ayni hata art arda tekrarlanirsa yukari iletilir
+        self.consecutive_errors += 1
+        METRICS.inc("batch_errors")
+        if self.consecutive_errors > config.ENGINE_MAX_CONSECUTIVE_ERRORS:
+            raise error
+        if self.consecutive_errors == 1:
+            traceback.print_exc()
+            print(f"Batch işlenemedi, atlanıyor: {error}")
+
+    def run_batches(self):
+        while not self.stop_event.is_set():
+            with self.streams_lock:
+                streams = list(self.streams.values())
+
+            batch = []
+            for stream in streams:
+                frames = stream.read()
+                if frames is None:
+                    if stream.is_finished():
+                        print(f"Kaynak sonlandı: {stream.camera_id}")
+                        self.remove_source(stream.camera_id)
+                    continue
+                batch.append((stream, *frames))
+
+            if not batch:
+                time.sleep(config.ENGINE_IDLE_SLEEP_SECONDS)
+                continue
+
+            for i in range(0, len(batch), self.max_batch_size):
+                try:
+                    self.process_batch(batch[i:i + self.max_batch_size])
+                except Exception as e:
+                    self.batch_failed(e)
+                else:
+                    self.consecutive_errors = 0
+
+    def process_batch(self, batch):
+        #her kameranin zamanlayicisi farkli bir cikarim boyutu secebilir; ayni boyuttakiler tek cagrida islenir
+        start_time = time.perf_counter()
+        groups = {}
+        for item in batch:
+            groups.setdefault(item[0].scheduler.imgsz, []).append(item)
+        for imgsz, group in groups.items():
+            with METRICS.stage("inference"):
+                results = self.model.predict([model_input for _, _, model_input in group], conf=config.TRACKER_MIN_CONFIDENCE,
+                                             imgsz=imgsz, verbose=False)
+            METRICS.set_gauge("batch_size", len(group))
+            for (stream, frame, model_input), result in zip(group, results):
+                stream.update(frame, model_input, result)
+        self.last_batch_latency = time.perf_counter() - start_time
+        self.batches_processed += 1
+        for stream, _, _ in batch:
+            stream.scheduler.record(self.last_batch_latency)
+
+    def run_with_workers(self):
+        #kameranin bos yuvasi varsa yeni kare gonderilir; sonuclar geldikce islenir, ana surec cikarimi beklemez
+        while not self.stop_event.is_set():
+            with self.streams_lock:
+                streams = list(self.streams.values())
+
+            for stream in streams:
+                if not self.pool.has_free_slot(stream.camera_id):
+                    continue
+                frames = stream.read()
+                if frames is None:
+                    if stream.is_finished() and not stream.pending:
+                        print(f"Kaynak sonlandı: {stream.camera_id}")
+                        self.remove_source(stream.camera_id)
+                    continue
+                frame, model_input = frames
+                token = self.pool.submit(stream.camera_id, model_input, stream.scheduler.imgsz)
+                if token is not None:
+                    stream.pending[token] = (frame, stream.processing_captured_at)
+
+            with self.streams_lock:
+                active = dict(self.streams)
+            for camera_id, token, tracks, detection_count, latency in self.pool.collect(timeout=config.ENGINE_IDLE_SLEEP_SECONDS):
+                stream = active.get(camera_id)
+                if stream is None or token not in stream.pending:
+                    continue
+                frame, captured_at = stream.pending.pop(token)
+                METRICS.observe("inference", latency, camera=camera_id)
+                try:
+                    stream.apply_tracks(frame, tracks, detection_count, captured_at)
+                except Exception as e:
+                    self.batch_failed(e)
+                    continue
+                self.consecutive_errors = 0
+                stream.scheduler.record(latency)
+                self.last_batch_latency = latency
+                self.batches_processed += 1
+            try:
+                dropped = self.pool.check_workers()
+            except WorkerError as e:
+                print(f"Çıkarım durduruldu: {e}")
+                self.error = e
+                return
+            #olen worker'daki kareler geri donmeyecek; beklenmezse biten dosya kaynaklari kaldirilabilir
+            for camera_id in dropped:
+                stream = active.get(camera_id)
+                if stream:
+                    stream.pending.clear()
+
+    def stats(self):
+        with self.streams_lock:
+            streams = list(self.streams.values())
+        return {
+            "streams": len(streams),
+            "batches_processed": self.batches_processed,
+            "last_batch_latency_ms": self.last_batch_latency * 1000,
+            "fps": {stream.camera_id: stream.fps() for stream in streams},
+            "capture": {stream.camera_id: stream.capture.stats() for stream in streams},
+            "scheduler": {stream.camera_id: stream.scheduler.stats() for stream in streams},
+            "tracks": {stream.camera_id: stream.violation_tracks.stats() for stream in streams},
+            "writer": self.violation_writer.stats(),
+            "alerts": self.alerts.stats(),
+            "retention": self.retention.stats(),
+            "upload": self.uploader.stats() if self.uploader else None,
+            "clips": {stream.camera_id: stream.clip_recorder.stats() for stream in streams if stream.clip_recorder},
+            "workers": self.pool.stats() if self.pool else None,
+        }
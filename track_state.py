@@ -0,0 +1,123 @@
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+import config
+
+#yayinlanacak ihlal: izin en kaliteli karesi ve o karedeki kutu
+ViolationSnapshot = namedtuple("ViolationSnapshot", ["track_id", "frame", "box", "confidence", "seen_at"])
+
+QUALITY_PATCH_SIZE = 64
+EDGE_MARGIN = 2
+
+
+def snapshot_quality(frame, box, confidence):
+    #guven x netlik (Laplacian varyansi) x boyut; kare kenarina kesilmis kutular cezalandirilir
+    img_h, img_w = frame.shape[:2]
+    x1, y1, x2, y2 = (int(v) for v in box)
+    cx1, cy1, cx2, cy2 = max(0, x1), max(0, y1), min(img_w, x2), min(img_h, y2)
+    if cx2 <= cx1 or cy2 <= cy1:
+        return 0.0
+    #netlik sabit boyutlu kucuk bir yamada olculur; boylece kutu boyutundan bagimsizdir ve ucuzdur
+    patch = cv2.resize(frame[cy1:cy2, cx1:cx2], (QUALITY_PATCH_SIZE, QUALITY_PATCH_SIZE), interpolation=cv2.INTER_LINEAR)
+    gray = cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY) if patch.ndim == 3 else patch
+    sharpness = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))[1][0, 0] ** 2
+    score = confidence * np.log1p(sharpness) * np.sqrt((cx2 - cx1) * (cy2 - cy1))
+    if x1 <= EDGE_MARGIN or y1 <= EDGE_MARGIN or x2 >= img_w - EDGE_MARGIN or y2 >= img_h - EDGE_MARGIN:
+        score *= 0.5
+    return float(score)
+
+
+class TrackState:
+    __slots__ = ("history", "last_seen", "confirmed_at", "emitted", "best_score", "best")
+
+    def __init__(self, window):
+        self.history = deque(maxlen=window)
+        self.last_seen = 0.0
+        self.confirmed_at = None
+        self.emitted = False
+        self.best_score = -1.0
+        self.best = None
+
+
+class ViolationTracks:
+    #iz basina ihlal durum makinesi: son M karenin en az N'inde esik ustu ihlal gorulen iz onaylanir.
+    #iz boyunca sadece en kaliteli kare bellekte tutulur; onaydan sonra pencere dolunca ya da iz bitince tek kayit uretilir
+    def __init__(self, confirm_hits=config.VIOLATION_CONFIRM_HITS, window=config.VIOLATION_CONFIRM_WINDOW,
+                 best_frame_seconds=config.VIOLATION_BEST_FRAME_SECONDS, lost_seconds=config.TRACK_LOST_SECONDS):
+        self.confirm_hits = confirm_hits
+        self.window = window
+        self.best_frame_seconds = best_frame_seconds
+        self.lost_seconds = lost_seconds
+        self.tracks = {}
+        self.tracks_confirmed = 0
+        self.tracks_discarded = 0
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def update(self, frame, records, threshold, now):
+        #records: DETECTION_DTYPE; donus: kaydedilmeye hazir ViolationSnapshot listesi
+        ready = []
+        violating = (records["cls_id"] == config.VIOLATION_CLASS_ID) & (records["conf"] >= threshold)
+        #ihlal gorulmemis izler icin durum tutulmaz; sadece ihlaller ve bilinen izler dolasilir
+        if self.tracks:
+            relevant = violating | np.isin(records["track_id"], np.fromiter(self.tracks, dtype=np.int64, count=len(self.tracks)))
+        else:
+            relevant = violating
+        seen = set()
+        for index in np.flatnonzero(relevant):
+            record = records[index]
+            is_violation = violating[index]
+            track_id = int(record["track_id"])
+            state = self.tracks.get(track_id)
+            if state is None:
+                state = self.tracks[track_id] = TrackState(self.window)
+            seen.add(track_id)
+            state.last_seen = now
+            state.history.append(bool(is_violation))
+            if state.emitted:
+                continue
+            if is_violation:
+                score = snapshot_quality(frame, record["box"], float(record["conf"]))
+                if score > state.best_score:
+                    #kareler salt-okunurdur; kopya yerine referans tutulur, onceki en iyi kare serbest kalir
+                    state.best_score = score
+                    state.best = ViolationSnapshot(track_id, frame, record["box"].tolist(), float(record["conf"]), now)
+                if state.confirmed_at is None and sum(state.history) >= self.confirm_hits:
+                    state.confirmed_at = now
+                    self.tracks_confirmed += 1
+            if state.confirmed_at is not None and now - state.confirmed_at >= self.best_frame_seconds:
+                ready.append(self.emit(state))
+
+        for track_id, state in list(self.tracks.items()):
+            if track_id not in seen and now - state.last_seen > self.lost_seconds:
+                del self.tracks[track_id]
+                if state.confirmed_at is not None and not state.emitted:
+                    ready.append(self.emit(state))
+                elif state.confirmed_at is None:
+                    self.tracks_discarded += 1
+        return ready
+
+    def emit(self, state):
+        snapshot = state.best
+        state.emitted = True
+        state.best = None
+        return snapshot
+
+    def flush(self):
+        #kaynak kapanirken onaylanmis ama henuz kaydedilmemis izler
+        ready = [self.emit(state) for state in self.tracks.values() if state.confirmed_at is not None and not state.emitted]
+        self.tracks.clear()
+        return ready
+
+    def clear(self):
+        self.tracks.clear()
+
+    def stats(self):
+        return {
+            "active": len(self.tracks),
+            "confirmed": self.tracks_confirmed,
+            "discarded": self.tracks_discarded,
+        }
@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
+from tkinter import font as tkfont
 
 class UIManager:
     def __init__(self, app_instance):
@@ -47,6 +48,9 @@ class UIManager:
         self.btn_settings = ttk.Button(control_frame, text="Gelişmiş Ayarlar", command=self.app.open_settings_window)
         self.btn_settings.pack(fill=tk.X, pady=(15, 4))
 
+        self.model_status_label = ttk.Label(control_frame, textvariable=self.app.model_status_var)
+        self.model_status_label.pack(anchor='w', pady=(10, 0))
+
         log_container = ttk.LabelFrame(right_pane, text="İhlal Kayıtları", padding=10)
         log_container.pack(fill=tk.BOTH, expand=True, pady=10)
         
@@ -61,12 +65,9 @@ class UIManager:
 
         log_list_frame = ttk.Frame(log_container)
         log_list_frame.pack(fill=tk.BOTH, expand=True)
-        self.log_listbox = tk.Listbox(log_list_frame, background="#313131", foreground="white", selectbackground="#0078d4", borderwidth=0, highlightthickness=0)
-        self.log_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        scrollbar = ttk.Scrollbar(log_list_frame, orient=tk.VERTICAL, command=self.log_listbox.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.log_listbox.config(yscrollcommand=scrollbar.set)
+        self.log_list = VirtualLogList(log_list_frame, self.app.fetch_log_rows, self.app.count_log_rows, self.app.format_log_row,
+                                       background="#313131", foreground="white", selectbackground="#0078d4", borderwidth=0, highlightthickness=0)
+        self.log_listbox = self.log_list.listbox
         self.log_listbox.bind("<<ListboxSelect>>", self.app.show_violation_in_new_window)
         
         log_footer_frame = ttk.Frame(log_container)
@@ -76,4 +77,94 @@ class UIManager:
         self.log_count_label.pack(side=tk.LEFT)
 
         self.btn_clear_logs = ttk.Button(log_footer_frame, text="Temizle", command=self.app.clear_logs, style='Danger.TButton')
-        self.btn_clear_logs.pack(side=tk.RIGHT)
\ No newline at end of file
+        self.btn_clear_logs.pack(side=tk.RIGHT)
+
+
+class VirtualLogList:
+    #sadece gorunen satirlar listbox'a yazilir, kayitlar kaydirdikca kaynaktan cekilir
+    def __init__(self, parent, fetch_rows, count_rows, format_row, **listbox_options):
+        self.fetch_rows = fetch_rows
+        self.count_rows = count_rows
+        self.format_row = format_row
+
+        self.offset = 0
+        self.total = 0
+        self.rows = []
+        self.visible_rows = 20
+
+        self.listbox = tk.Listbox(parent, **listbox_options)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.row_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+        self.listbox.bind("<Configure>", self.on_configure)
+        self.listbox.bind("<MouseWheel>", self.on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
+
+    def on_configure(self, event):
+        visible_rows = max(1, event.height // self.row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.scroll_to(self.offset, force=True)
+
+    def on_mousewheel(self, event):
+        self.scroll_to(self.offset - int(event.delta / 120) * 3)
+        return "break"
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * self.total))
+        elif args[0] == "scroll":
+            step = self.visible_rows if args[2] == "pages" else 1
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def scroll_to(self, offset, force=False):
+        offset = max(0, min(offset, self.total - self.visible_rows))
+        if offset != self.offset or force:
+            self.offset = offset
+            self.render()
+
+    def reload(self):
+        self.total = self.count_rows()
+        self.offset = 0
+        self.render()
+
+    def refresh_new_rows(self):
+        #yeni kayitlar en uste eklenir; asagi kaydirilmissa gorunen pencere yerinde kalir
+        total = self.count_rows()
+        added = total - self.total
+        self.total = total
+        if added <= 0:
+            return
+        if self.offset > 0:
+            self.offset += added
+            self.update_scrollbar()
+        else:
+            self.render()
+
+    def render(self):
+        self.rows = self.fetch_rows(self.offset, self.visible_rows) if self.total else []
+        self.listbox.delete(0, tk.END)
+        if self.rows:
+            self.listbox.insert(tk.END, *[self.format_row(row) for row in self.rows])
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, min(1.0, (self.offset + self.visible_rows) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def clear(self):
+        self.total = 0
+        self.offset = 0
+        self.rows = []
+        self.listbox.delete(0, tk.END)
+        self.update_scrollbar()
+
+    def record_at(self, index):
+        if 0 <= index < len(self.rows):
+            return self.rows[index]
+        return None
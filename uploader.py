@@ -0,0 +1,277 @@
+import http.client
+import json
+import os
+import re
+import socket
+import struct
+import threading
+import urllib.parse
+
+import cv2
+import numpy as np
+
+import config
+from metrics import METRICS
+from violation_store import format_timestamp
+
+UPLOAD_PATH = "/api/v1/violations/bulk"
+BATCH_CONTENT_TYPE = "application/x-hardhat-batch"
+HEADER_LENGTH = struct.Struct(">I")
+SITE_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+STORE_UUID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadError(Exception):
+    pass
+
+
+class UploadRejected(UploadError):
+    #servis istegi kalici olarak reddetti (yetki, gecersiz site_id, bozuk paket); baglanti sorunu degil
+    pass
+
+
+def default_site_id():
+    #makine adi servisin kabul ettigi karakterlere ve uzunluga indirgenir
+    return re.sub(r"[^A-Za-z0-9._-]", "-", socket.gethostname())[:64] or "site"
+
+
+def encode_batch(site_id, store_uuid, items):
+    #govde: 4 bayt baslik uzunlugu + JSON baslik + ardisik JPEG'ler; base64 sisirmesi olmaz
+    #items: (kayit sozlugu, jpeg baytlari ya da None)
+    records, blobs, offset = [], [], 0
+    for record, image in items:
+        record = dict(record)
+        if image:
+            record["image_offset"] = offset
+            record["image_size"] = len(image)
+            blobs.append(image)
+            offset += len(image)
+        records.append(record)
+    header = json.dumps({"site_id": site_id, "store_uuid": store_uuid, "records": records}, ensure_ascii=False).encode("utf-8")
+    return b"".join([HEADER_LENGTH.pack(len(header)), header, *blobs])
+
+
+def decode_batch(body):
+    #donus: (site_id, store_uuid, [(kayit sozlugu, jpeg baytlari ya da None)])
+    if len(body) < HEADER_LENGTH.size:
+        raise ValueError("Eksik paket")
+    (header_length,) = HEADER_LENGTH.unpack_from(body)
+    start = HEADER_LENGTH.size + header_length
+    if start > len(body):
+        raise ValueError("Eksik paket başlığı")
+    header = json.loads(body[HEADER_LENGTH.size:start].decode("utf-8"))
+    items = []
+    for record in header["records"]:
+        image = None
+        if "image_offset" in record:
+            image_start = start + int(record.pop("image_offset"))
+            image_end = image_start + int(record.pop("image_size"))
+            if image_end > len(body):
+                raise ValueError("Eksik görüntü verisi")
+            image = body[image_start:image_end]
+        items.append((record, image))
+    return header["site_id"], header["store_uuid"], items
+
+
+def compress_image(image_path, max_width=config.UPLOAD_IMAGE_MAX_WIDTH, quality=config.UPLOAD_JPEG_QUALITY):
+    #kayitli JPEG kucultulup daha dusuk kaliteyle yeniden kodlanir; dosya silinmisse None
+    try:
+        with open(image_path, "rb") as f:
+            data = f.read()
+    except (OSError, TypeError):
+        return None
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+    if max_width and image.shape[1] > max_width:
+        height = round(image.shape[0] * max_width / image.shape[1])
+        image = cv2.resize(image, (max_width, height), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        return None
+    #yeniden kodlama kazandirmiyorsa orijinal dosya gonderilir
+    return encoded.tobytes() if len(encoded) < len(data) else data
+
+
+def record_to_dict(record):
+    return {
+        "id": record.id,
+        "timestamp": format_timestamp(record.timestamp),
+        "camera_id": record.camera_id,
+        "track_id": record.track_id,
+        "box": list(record.box) if record.box else None,
+        "confidence": record.confidence,
+        "image_name": os.path.basename(record.image_path) if record.image_path else None,
+    }
+
+
+class CollectorClient:
+    #toplama servisine kalici (keep-alive) HTTP baglantisi; baglanti kopunca bir sonraki istekte yeniden kurulur
+    def __init__(self, url, timeout=config.UPLOAD_TIMEOUT_SECONDS, token=None):
+        parsed = urllib.parse.urlsplit(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Geçersiz toplama servisi adresi: {url}")
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.base_path = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self.token = token
+        self.conn = None
+        self.connections_opened = 0
+
+    def connect(self):
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        self.conn = connection_class(self.host, self.port, timeout=self.timeout)
+        self.connections_opened += 1
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def post(self, path, body, content_type):
+        headers = {"Content-Type": content_type, "Content-Length": str(len(body))}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        #bekleyen baglanti karsi taraftan kapatilmis olabilir; yeni baglantiyla bir kez daha denenir
+        for attempt in range(2):
+            reused = self.conn is not None
+            if not reused:
+                self.connect()
+            try:
+                self.conn.request("POST", self.base_path + path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                self.close()
+                raise
+            if response.getheader("Connection", "").lower() == "close":
+                self.close()
+            return response.status, data
+
+
+class ViolationUploader:
+    #kayitlar veritabanindan id sirasiyla okunur, goruntulerle birlikte toplu gonderilir.
+    #imlec sadece servis onayladiktan sonra ilerler; baglanti yokken kayitlar veritabaninda bekler (saklama kotasi sinirlar)
+    #ve baglanti gelince kalinan yerden devam edilir. Servis (site_id, store_uuid, id) ile tekrarlari yok sayar
+    def __init__(self, store, url, site_id=None, token=None, batch_size=config.UPLOAD_BATCH_SIZE,
+                 max_batch_mb=config.UPLOAD_MAX_BATCH_MB, interval=config.UPLOAD_INTERVAL_SECONDS,
+                 retry_initial=config.UPLOAD_RETRY_INITIAL_SECONDS, retry_max=config.UPLOAD_RETRY_MAX_SECONDS):
+        self.store = store
+        self.url = url
+        self.site_id = site_id or default_site_id()
+        if not SITE_ID_PATTERN.match(self.site_id):
+            raise ValueError(f"Geçersiz site_id: {self.site_id} (harf, rakam, '.', '_', '-'; en fazla 64 karakter)")
+        self.client = CollectorClient(url, token=token)
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_mb * 1024 * 1024
+        self.interval = interval
+        self.retry_initial = retry_initial
+        self.retry_max = retry_max
+        self.cursor_key = f"upload_cursor:{self.site_id}@{url}"
+        self.cursor = int(store.get_meta(self.cursor_key, 0))
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.link_up = None
+        self.records_uploaded = 0
+        self.duplicates = 0
+        self.bytes_uploaded = 0
+        self.failures = 0
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=2):
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+        self.thread = None
+        self.client.close()
+
+    def run(self):
+        delay = 0.0
+        retry_delay = self.retry_initial
+        while not self.stop_event.wait(delay):
+            try:
+                sent = self.upload_pending()
+            except UploadRejected as e:
+                #ayni batch ayar duzeltilmeden kabul edilmez; hata bir kez yazilir, en uzun beklemeyle yeniden denenir
+                self.failures += 1
+                METRICS.inc("upload_failures")
+                if self.link_up != "rejected":
+                    print(f"Hata: Toplama servisi yüklemeyi reddetti, ayarları kontrol edin (site_id={self.site_id}): {e}")
+                self.link_up = "rejected"
+                delay = self.retry_max
+                continue
+            except (OSError, http.client.HTTPException, UploadError, ValueError) as e:
+                self.failures += 1
+                METRICS.inc("upload_failures")
+                if self.link_up is not False:
+                    print(f"Toplama servisine yüklenemedi, kayıtlar bekletiliyor: {e}")
+                self.link_up = False
+                delay = retry_delay
+                retry_delay = min(retry_delay * 2, self.retry_max)
+                continue
+            if self.link_up in (False, "rejected"):
+                print("Toplama servisi bağlantısı geri geldi, yükleme devam ediyor.")
+            self.link_up = True
+            retry_delay = self.retry_initial
+            #dolu batch birikme oldugunu gosterir; beklemeden devam edilir
+            delay = 0.0 if sent >= self.batch_size else self.interval
+
+    def build_batch(self, records):
+        items, total = [], 0
+        for record in records:
+            image = compress_image(record.image_path)
+            size = len(image) if image else 0
+            if items and total + size > self.max_batch_bytes:
+                break
+            items.append((record_to_dict(record), image))
+            total += size
+        return items
+
+    def upload_pending(self):
+        records = self.store.after(self.cursor, self.batch_size)
+        if not records:
+            return 0
+        items = self.build_batch(records)
+        body = encode_batch(self.site_id, self.store.uuid, items)
+        status, data = self.client.post(UPLOAD_PATH, body, BATCH_CONTENT_TYPE)
+        if status != 200:
+            message = f"HTTP {status}: {data[:200].decode('utf-8', 'replace')}"
+            #408 ve 429 gecicidir; diger 4xx yanitlari tekrar denemekle duzelmez
+            if 400 <= status < 500 and status not in (408, 429):
+                raise UploadRejected(message)
+            raise UploadError(message)
+        ack = json.loads(data.decode("utf-8"))
+        last_id = items[-1][0]["id"]
+        if ack.get("last_id") != last_id:
+            raise UploadError(f"Beklenmeyen onay: {ack}")
+        self.cursor = last_id
+        self.store.set_meta(self.cursor_key, last_id)
+        self.records_uploaded += ack.get("accepted", 0)
+        self.duplicates += ack.get("duplicates", 0)
+        self.bytes_uploaded += len(body)
+        METRICS.inc("records_uploaded", len(items))
+        return len(items)
+
+    def stats(self):
+        return {
+            "site_id": self.site_id,
+            "link_up": self.link_up,
+            "cursor": self.cursor,
+            "pending": self.store.count_after(self.cursor),
+            "uploaded": self.records_uploaded,
+            "duplicates": self.duplicates,
+            "uploaded_mb": self.bytes_uploaded / (1024 * 1024),
+            "failures": self.failures,
+            "connections": self.client.connections_opened,
+        }
@@ -1,98 +1,156 @@
-import cv2
 import time
-import math
 import datetime
-import os
-from ultralytics import YOLO
+
+import numpy as np
 
 import config
+from frame_buffer import VIOLATION_COLOR, HELMET_COLOR
+from violation_writer import ViolationEvent
+from metrics import METRICS
+from scheduler import InferenceScheduler
+from inference_workers import EMPTY_TRACKS, WorkerError
+
+#cizim kayitlari: etiketler sadece ekrana cizilirken uretilir
+DETECTION_DTYPE = np.dtype([("box", np.int32, (4,)), ("track_id", np.int32), ("conf", np.float32), ("cls_id", np.int16)])
+EMPTY_DETECTIONS = np.zeros(0, dtype=DETECTION_DTYPE)
+
+
+def build_detection_records(boxes, track_ids, confs, clss):
+    records = np.empty(len(track_ids), dtype=DETECTION_DTYPE)
+    records["box"] = boxes
+    records["track_id"] = track_ids
+    records["conf"] = confs
+    records["cls_id"] = clss
+    return records
+
+
+def detection_label(record, names):
+    return f"ID:{record['track_id']} | {names[int(record['cls_id'])]} {record['conf']:.2f}"
+
+
+def build_overlay(records, names, show_helmets=True):
+    mask = records["cls_id"] == config.VIOLATION_CLASS_ID
+    if show_helmets:
+        mask |= records["cls_id"] == config.HELMET_CLASS_ID
+    overlay = []
+    for record in records[mask]:
+        color = VIOLATION_COLOR if record["cls_id"] == config.VIOLATION_CLASS_ID else HELMET_COLOR
+        overlay.append((record["box"].tolist(), detection_label(record, names), color))
+    return overlay
+
 
 class VideoProcessor:
-    def __init__(self, app_instance):
+    def __init__(self, app_instance, camera_id=None):
         self.app = app_instance 
         self.model = self.app.model
+        self.camera_id = camera_id
+        self.scheduler = InferenceScheduler(roi=config.CAMERA_ROIS.get(camera_id, config.DEFAULT_ROI), name=camera_id)
         
     def run(self):
+        #model arka planda yukleniyorsa yakalama ve goruntu akmaya devam eder; cikarim model hazir olunca baslar
+        while not self.app.model_ready.wait(0.1):
+            if self.app.stop_event.is_set():
+                return
+        self.model = self.app.model
+        scheduler = self.scheduler
         while not self.app.stop_event.is_set():
-            frame_to_process = None
-            with self.app.frame_lock:
-                if self.app.latest_frame is not None:
-                    frame_to_process = self.app.latest_frame.copy()
-
-            if frame_to_process is None:
-                time.sleep(0.01)
+            captured = self.app.capture.ring.wait_latest(scheduler.last_seq, timeout=0.1) if self.app.capture else None
+            if captured is None or not scheduler.admit(captured):
+                continue
+            frame_to_process = captured.image
+            model_input = scheduler.crop(frame_to_process)
+            if not scheduler.wants_inference(model_input):
+                #durgun sahne: son (bos) sonuc bu kare icin de gecerli
+                self.advance_tracks(frame_to_process)
+                with self.app.results_lock:
+                    self.app.latest_results_captured_at = captured.captured_at
                 continue
 
-            current_threshold = self.app.confidence_var.get()
-            
-            results = self.model.track(frame_to_process, persist=True, verbose=False)
+            start_time = time.perf_counter()
+            try:
+                with METRICS.stage("inference", self.camera_id):
+                    tracks, detection_count = self.infer(model_input)
+            except WorkerError as e:
+                #worker'lar yeniden baslatilamiyor; cikarim durur, kayitli izler yine de kapatilir
+                print(f"Çıkarım durduruldu: {e}")
+                break
             
-            current_results_data = []
-            active_track_ids = set()
-
-            now = time.time()
-            self.app.recent_log_zones = [(t, x, y) for t, x, y in self.app.recent_log_zones if now - t < config.LOG_COOLDOWN_SECONDS]
-
-            if results[0].boxes.id is not None:
-                boxes = results[0].boxes.xyxy.cpu()
-                track_ids = results[0].boxes.id.int().cpu().tolist()
-                confs = results[0].boxes.conf.cpu().tolist()
-                clss = results[0].boxes.cls.cpu().tolist()
-                
-                for box, track_id, conf, cls in zip(boxes, track_ids, confs, clss):
-                    active_track_ids.add(track_id)
-                    is_violation = (int(cls) == config.VIOLATION_CLASS_ID)
-                    
-                    if (is_violation and 
-                        conf >= current_threshold and 
-                        track_id not in self.app.logged_tracker_ids):
-                        
-                        cx, cy = (box[0] + box[2]) // 2, (box[1] + box[3]) // 2
-                        is_in_cooldown_zone = False
-                        for log_time, log_cx, log_cy in self.app.recent_log_zones:
-                            distance = math.sqrt((cx - log_cx)**2 + (cy - log_cy)**2)
-                            if distance < config.LOG_ZONE_RADIUS:
-                                is_in_cooldown_zone = True
-                                break
-                        
-                        if not is_in_cooldown_zone:
-                            log_data = [(list(map(int, box)), f"ID:{track_id} | IHLAL")]
-                            self.log_violation(frame_to_process, log_data)
-                            self.app.logged_tracker_ids.add(track_id)
-                            self.app.recent_log_zones.append((time.time(), cx, cy))
-
-                    label = f"ID:{track_id} | {self.model.names[int(cls)]} {conf:.2f}"
-                    current_results_data.append({
-                        "box": list(map(int, box)),
-                        "label": label,
-                        "cls_id": int(cls)
-                    })
-
-            with self.app.results_lock: self.app.latest_results_for_drawing = current_results_data
+            #bos karelerde de cagrilir: kaybolan izlerin durumu ancak boyle kapanir
+            with METRICS.stage("postprocess", self.camera_id):
+                current_results_data = self.process_detections(
+                    frame_to_process, scheduler.to_frame(tracks[:, :4]), tracks[:, 4], tracks[:, 5], tracks[:, 6])
+            scheduler.observe(detection_count)
+            scheduler.record(time.perf_counter() - start_time)
+
+            with self.app.results_lock:
+                self.app.latest_results_for_drawing = current_results_data
+                self.app.latest_results_captured_at = captured.captured_at
+            METRICS.inc("frames_processed", camera=self.camera_id)
+        self.finish_tracks()
+
+    def infer(self, model_input):
+        #izler (x1, y1, x2, y2, id, conf, cls) ve ham tespit sayisi; worker havuzu varsa cikarim ayri surecte yapilir
+        if self.app.inference_pool:
+            try:
+                return self.app.inference_pool.infer(self.camera_id, model_input, self.scheduler.imgsz)
+            except TimeoutError as e:
+                #yanit gelmeyen kare atlanir; worker durduysa bir sonraki cagrida yeniden baslatilir
+                print(f"Kare atlandı: {e}")
+                return EMPTY_TRACKS, 0
+        results = self.model.track(model_input, persist=True, imgsz=self.scheduler.imgsz, verbose=False)
+        boxes = results[0].boxes
+        if boxes.id is None:
+            return EMPTY_TRACKS, len(boxes)
+        return boxes.data.cpu().numpy(), len(boxes)
+
+    def process_detections(self, frame_to_process, boxes, track_ids, confs, clss, now=None):
+        #now: cooldown hesaplarinda kullanilan zaman; offline analizde video zamani verilir
+        current_threshold = self.app.confidence_var.get()
+        records = build_detection_records(boxes, track_ids, confs, clss)
+
+        now = time.time() if now is None else now
+        self.app.recent_log_zones.expire(now)
+        self.log_snapshots(self.app.violation_tracks.update(frame_to_process, records, current_threshold, now), now)
+        return records
+
+    def advance_tracks(self, frame_to_process, now=None):
+        #hareket kapisinin atladigi karede tespit yoktur; bekleyen izler yine de zamaninda kaydedilir ya da kapanir
+        if len(self.app.violation_tracks):
+            self.process_detections(frame_to_process, EMPTY_TRACKS[:, :4], EMPTY_TRACKS[:, 4], EMPTY_TRACKS[:, 5], EMPTY_TRACKS[:, 6], now)
+
+    def finish_tracks(self, now=None):
+        #kaynak kapanirken onaylanmis ama henuz kaydedilmemis izler de kaydedilir
+        self.log_snapshots(self.app.violation_tracks.flush(), time.time() if now is None else now)
+
+    def log_snapshots(self, snapshots, now):
+        #id degisen ayni kisi icin ikinci kayit, cooldown bolgesiyle bastirilir
+        if not snapshots:
+            return
+        centers = [((box[0] + box[2]) // 2, (box[1] + box[3]) // 2) for box in (snapshot.box for snapshot in snapshots)]
+        for i in self.app.recent_log_zones.admit_many(centers, now):
+            snapshot = snapshots[i]
+            log_data = [(snapshot.box, f"ID:{snapshot.track_id} | IHLAL", VIOLATION_COLOR)]
+            self.log_violation(snapshot.frame, log_data, snapshot.track_id, snapshot.confidence, snapshot.seen_at)
     
-    def log_violation(self, frame_to_save, results_to_draw):
-        now = datetime.datetime.now()
-        timestamp_for_file = now.strftime("%Y-%m-%d %H:%M:%S.%f")
-        log_image = frame_to_save.copy()
-
-        if self.app.show_boxes_var.get():
-            for coords, label in results_to_draw:
-                x1, y1, x2, y2 = coords
-                cv2.rectangle(log_image, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                cv2.putText(log_image, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        
-        filename = f"violation_{now.strftime('%Y%m%d_%H%M%S_%f')}.jpg"
-        save_path = os.path.join(config.VIOLATION_IMG_DIR, filename)
-        jpeg_quality = [cv2.IMWRITE_JPEG_QUALITY, 95]
+    def log_violation(self, frame_to_save, results_to_draw, track_id=None, confidence=None, observed_at=None):
+        timestamp = datetime.datetime.now()
+        #klip kaydin yapildigi ana gore acilir; observed_at uzun izlerde on kayit tamponundan cok daha eski olabilir.
+        #klip yolu kayda, klip yazildiktan sonra ClipRecorder tarafindan eklenir
+        if self.app.clip_recorder:
+            self.app.clip_recorder.request(timestamp)
+        event = ViolationEvent(
+            timestamp=timestamp,
+            camera_id=self.camera_id,
+            track_id=track_id,
+            box=results_to_draw[0][0] if results_to_draw else None,
+            confidence=confidence,
+            frame=frame_to_save,
+            overlay=results_to_draw if self.app.show_boxes_var.get() else [],
+            observed_at=observed_at,
+        )
+        self.app.violation_writer.submit(event)
 
-        if cv2.imwrite(save_path, log_image, jpeg_quality):
-            with open(config.LOG_FILE_PATH, "a", encoding="utf-8") as f:
-                f.write(f"{timestamp_for_file}|{save_path}\n")
-            
-            self.app.log_queue.put((now, save_path))
 
-            notification_data = {
-                'title': 'Baret İhlali Tespit Edildi!',
-                'message': f"Saat {now.strftime('%H:%M:%S')} itibarıyla bir ihlal kaydedildi."
-            }
-            self.app.notification_queue.put(notification_data)
\ No newline at end of file
+def publish_violation(app_instance, event, save_path):
+    app_instance.log_queue.put((event.timestamp, save_path))
+    app_instance.alerts.publish(event, save_path)
@@ -0,0 +1,277 @@
+import argparse
+import datetime
+import os
+import sqlite3
+import threading
+import uuid
+from collections import namedtuple
+
+import config
+from retention import file_size, thumbnail_path
+
+#media_bytes: goruntu ve kucuk resmin yazildiklari andaki toplam boyutu (disk kotasi icin)
+ViolationRecord = namedtuple("ViolationRecord", ["id", "timestamp", "camera_id", "track_id", "box", "confidence", "image_path", "clip_path",
+                                                 "media_bytes"], defaults=(None,))
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS violations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    camera_id TEXT,
+    track_id INTEGER,
+    x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
+    confidence REAL,
+    image_path TEXT NOT NULL UNIQUE,
+    clip_path TEXT,
+    media_bytes INTEGER,
+    clip_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_violations_timestamp ON violations (timestamp);
+CREATE INDEX IF NOT EXISTS idx_violations_camera_timestamp ON violations (camera_id, timestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+SELECT_COLUMNS = "id, timestamp, camera_id, track_id, x1, y1, x2, y2, confidence, image_path, clip_path, media_bytes"
+
+#eski veritabanlarina sonradan eklenen kolonlar
+MIGRATIONS = (
+    ("clip_path", "ALTER TABLE violations ADD COLUMN clip_path TEXT"),
+    ("media_bytes", "ALTER TABLE violations ADD COLUMN media_bytes INTEGER"),
+    ("clip_bytes", "ALTER TABLE violations ADD COLUMN clip_bytes INTEGER"),
+)
+
+#kolonlar eklendikten sonra olusturulabilen indeksler
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_violations_clip_path ON violations (clip_path);
+"""
+
+
+def format_timestamp(dt_obj):
+    return dt_obj.strftime(TIMESTAMP_FORMAT)
+
+
+def row_to_record(row):
+    record_id, timestamp, camera_id, track_id, x1, y1, x2, y2, confidence, image_path, clip_path, media_bytes = row
+    box = (x1, y1, x2, y2) if x1 is not None else None
+    return ViolationRecord(record_id, datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT), camera_id, track_id, box, confidence,
+                           image_path, clip_path, media_bytes)
+
+
+class ViolationStore:
+    #zaman indeksli ihlal kayitlari (sqlite, WAL modu)
+    def __init__(self, db_path=config.DB_PATH):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.migrate()
+        self.conn.executescript(INDEXES)
+        self.conn.commit()
+        self.uuid = self.ensure_uuid()
+
+    def migrate(self):
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(violations)")}
+        for column, statement in MIGRATIONS:
+            if column not in columns:
+                self.conn.execute(statement)
+
+    def ensure_uuid(self):
+        #veritabanina ozel kimlik; id'ler sadece bu veritabani icinde tekildir, merkezde (site, uuid, id) ile ayirt edilir
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'store_uuid'").fetchone()
+        if row:
+            return row[0]
+        store_uuid = uuid.uuid4().hex
+        with self.conn:
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('store_uuid', ?)", (store_uuid,))
+        return store_uuid
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def add_many(self, entries):
+        #entries: (timestamp, camera_id, track_id, box, confidence, image_path, clip_path, media_bytes)
+        #media_bytes None ise goruntu ve kucuk resmin boyutuna bakilir
+        rows = []
+        for timestamp, camera_id, track_id, box, confidence, image_path, clip_path, media_bytes in entries:
+            x1, y1, x2, y2 = (int(v) for v in box) if box is not None else (None, None, None, None)
+            rows.append((
+                format_timestamp(timestamp),
+                str(camera_id) if camera_id is not None else None,
+                int(track_id) if track_id is not None else None,
+                x1, y1, x2, y2,
+                float(confidence) if confidence is not None else None,
+                image_path,
+                clip_path,
+                media_bytes if media_bytes is not None else file_size(image_path) + file_size(thumbnail_path(image_path)),
+                file_size(clip_path) if clip_path else None,
+            ))
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO violations (timestamp, camera_id, track_id, x1, y1, x2, y2, confidence, image_path, clip_path, "
+                    "media_bytes, clip_bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def add(self, timestamp, image_path, camera_id=None, track_id=None, box=None, confidence=None, clip_path=None, media_bytes=None):
+        self.add_many([(timestamp, camera_id, track_id, box, confidence, image_path, clip_path, media_bytes)])
+
+    def build_filter(self, since=None, until=None, camera_id=None):
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("timestamp > ?")
+            params.append(format_timestamp(since))
+        if until is not None:
+            clauses.append("timestamp <= ?")
+            params.append(format_timestamp(until))
+        if camera_id is not None:
+            clauses.append("camera_id = ?")
+            params.append(str(camera_id))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def query(self, since=None, until=None, camera_id=None, limit=None, offset=0):
+        where, params = self.build_filter(since, until, camera_id)
+        sql = f"SELECT {SELECT_COLUMNS} FROM violations{where} ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [row_to_record(row) for row in rows]
+
+    def oldest(self, limit, until=None):
+        where, params = self.build_filter(until=until)
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {SELECT_COLUMNS} FROM violations{where} ORDER BY timestamp ASC, id ASC LIMIT ?",
+                                     params + [limit]).fetchall()
+        return [row_to_record(row) for row in rows]
+
+    def delete(self, record_ids):
+        with self.lock:
+            with self.conn:
+                self.conn.executemany("DELETE FROM violations WHERE id = ?", [(record_id,) for record_id in record_ids])
+
+    def attach_clip(self, clip_path, clip_bytes, camera_id, since, until):
+        #klip yazildiktan sonra penceresindeki ihlallere baglanir; yazilamayan klip hic kayda girmez
+        with self.lock:
+            with self.conn:
+                self.conn.execute("UPDATE violations SET clip_path = ?, clip_bytes = ? "
+                                  "WHERE clip_path IS NULL AND camera_id IS ? AND timestamp >= ? AND timestamp <= ?",
+                                  (clip_path, clip_bytes, str(camera_id) if camera_id is not None else None,
+                                   format_timestamp(since), format_timestamp(until)))
+
+    def clip_referenced(self, clip_path):
+        #birden fazla ihlal ayni klibi paylasabilir
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM violations WHERE clip_path = ? LIMIT 1", (clip_path,)).fetchone() is not None
+
+    def media_usage(self):
+        #kayitlarin gosterdigi dosyalarin yazildiklari andaki toplam boyutu; paylasilan klip bir kez sayilir
+        with self.lock:
+            media = self.conn.execute("SELECT COALESCE(SUM(media_bytes), 0) FROM violations").fetchone()[0]
+            clips = self.conn.execute("SELECT COALESCE(SUM(clip_bytes), 0) FROM (SELECT MAX(clip_bytes) AS clip_bytes FROM violations "
+                                      "WHERE clip_path IS NOT NULL GROUP BY clip_path)").fetchone()[0]
+        return media + clips
+
+    def missing_sizes(self, limit):
+        #boyut kolonlari eklenmeden once yazilmis kayitlar: (id, image_path, clip_path)
+        with self.lock:
+            return self.conn.execute("SELECT id, image_path, clip_path FROM violations "
+                                     "WHERE media_bytes IS NULL OR (clip_path IS NOT NULL AND clip_bytes IS NULL) LIMIT ?", (limit,)).fetchall()
+
+    def set_sizes(self, sizes):
+        #sizes: (id, media_bytes, clip_bytes)
+        with self.lock:
+            with self.conn:
+                self.conn.executemany("UPDATE violations SET media_bytes = ?, clip_bytes = ? WHERE id = ?",
+                                      [(media_bytes, clip_bytes, record_id) for record_id, media_bytes, clip_bytes in sizes])
+
+    def count(self, since=None, until=None, camera_id=None):
+        where, params = self.build_filter(since, until, camera_id)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM violations{where}", params).fetchone()[0]
+
+    def get(self, record_id):
+        with self.lock:
+            row = self.conn.execute(f"SELECT {SELECT_COLUMNS} FROM violations WHERE id = ?", (record_id,)).fetchone()
+        return row_to_record(row) if row else None
+
+    def after(self, record_id, limit):
+        #id sirasiyla, verilen id'den sonra eklenen kayitlar (yukleme imleci icin)
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {SELECT_COLUMNS} FROM violations WHERE id > ? ORDER BY id ASC LIMIT ?",
+                                     (record_id, limit)).fetchall()
+        return [row_to_record(row) for row in rows]
+
+    def count_after(self, record_id):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM violations WHERE id > ?", (record_id,)).fetchone()[0]
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.lock:
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def clear(self):
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM violations")
+
+    def import_log_file(self, log_path=config.LOG_FILE_PATH, force=False):
+        #eski violations.log dosyasini bir kez iceri aktarir
+        if not os.path.exists(log_path):
+            return 0
+        meta_key = f"imported:{os.path.abspath(log_path)}"
+        with self.lock:
+            already_imported = self.conn.execute("SELECT 1 FROM meta WHERE key = ?", (meta_key,)).fetchone()
+        if already_imported and not force:
+            return 0
+
+        entries = []
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if "|" in line:
+                    try:
+                        timestamp_str, image_path = line.strip().split("|")
+                        dt_obj = datetime.datetime.strptime(timestamp_str, TIMESTAMP_FORMAT)
+                        if os.path.exists(image_path):
+                            entries.append((dt_obj, None, None, None, None, image_path, None, None))
+                    except (ValueError, IndexError):
+                        print(f"Hatalı log satırı atlanıyor: {line.strip()}")
+                        continue
+
+        self.add_many(entries)
+        with self.lock:
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                  (meta_key, format_timestamp(datetime.datetime.now())))
+        return len(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="violations.log dosyalarını ihlal veritabanına aktarır.")
+    parser.add_argument("log_files", nargs="*", default=[config.LOG_FILE_PATH])
+    parser.add_argument("--db", default=config.DB_PATH)
+    parser.add_argument("--force", action="store_true", help="Daha önce aktarılmış dosyaları yeniden aktar")
+    args = parser.parse_args()
+
+    store = ViolationStore(args.db)
+    for log_file in args.log_files:
+        imported = store.import_log_file(log_file, force=args.force)
+        print(f"{log_file}: {imported} kayıt aktarıldı")
+    store.close()
@@ -0,0 +1,191 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from queue import Queue, Empty, Full
+
+import cv2
+
+import config
+from frame_buffer import render_snapshot
+from metrics import METRICS
+from retention import shard_dir, thumbnail_path
+
+#observed_at: kaydedilen karenin goruldugu an (canlida time.time(), offline analizde video zamani)
+ViolationEvent = namedtuple("ViolationEvent", ["timestamp", "camera_id", "track_id", "box", "confidence", "frame", "overlay", "clip_path",
+                                               "observed_at"], defaults=(None, None))
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_BLOCK = "block"
+
+
+class ViolationWriter:
+    #jpeg kodlama ve veritabani yazimi inference thread'inden ayri calisir
+    def __init__(self, store, on_written=None, num_workers=config.WRITER_NUM_WORKERS, queue_size=config.WRITER_QUEUE_SIZE,
+                 jpeg_quality=config.VIOLATION_JPEG_QUALITY, max_width=config.VIOLATION_IMAGE_MAX_WIDTH,
+                 overflow_policy=config.WRITER_OVERFLOW_POLICY, image_dir=config.VIOLATION_IMG_DIR):
+        self.store = store
+        self.on_written = on_written
+        self.num_workers = num_workers
+        self.jpeg_quality = jpeg_quality
+        self.max_width = max_width
+        self.overflow_policy = overflow_policy
+        self.image_dir = image_dir
+
+        self.job_queue = Queue(maxsize=queue_size)
+        self.record_queue = Queue()
+        self.workers = []
+        self.record_thread = None
+
+        self.stats_lock = threading.Lock()
+        self.events_submitted = 0
+        self.events_dropped = 0
+        self.events_written = 0
+        self.events_failed = 0
+        self.total_write_latency = 0.0
+        self.max_write_latency = 0.0
+
+    def start(self):
+        os.makedirs(self.image_dir, exist_ok=True)
+        self.workers = [threading.Thread(target=self.encode_worker, daemon=True) for _ in range(self.num_workers)]
+        for worker in self.workers:
+            worker.start()
+        self.record_thread = threading.Thread(target=self.record_worker, daemon=True)
+        self.record_thread.start()
+
+    def close(self, timeout=5):
+        for _ in self.workers:
+            self.job_queue.put(None)
+        for worker in self.workers:
+            worker.join(timeout=timeout)
+        self.workers = []
+        if self.record_thread:
+            self.record_queue.put(None)
+            self.record_thread.join(timeout=timeout)
+        self.record_thread = None
+
+    def submit(self, event):
+        item = (time.perf_counter(), event)
+        with self.stats_lock:
+            self.events_submitted += 1
+        try:
+            if self.overflow_policy == OVERFLOW_BLOCK:
+                self.job_queue.put(item)
+                return True
+            self.job_queue.put_nowait(item)
+            METRICS.set_gauge("writer_queue_depth", self.job_queue.qsize())
+            return True
+        except Full:
+            pass
+
+        if self.overflow_policy == OVERFLOW_DROP_OLDEST:
+            try:
+                self.job_queue.get_nowait()
+                self.job_queue.put_nowait(item)
+            except (Empty, Full):
+                pass
+        with self.stats_lock:
+            self.events_dropped += 1
+        METRICS.inc("violations_dropped")
+        return self.overflow_policy == OVERFLOW_DROP_OLDEST
+
+    def build_path(self, event):
+        stamp = event.timestamp.strftime('%Y%m%d_%H%M%S_%f')
+        if event.camera_id is not None:
+            filename = f"violation_{event.camera_id}_{stamp}.jpg"
+        else:
+            filename = f"violation_{stamp}.jpg"
+        return os.path.join(shard_dir(self.image_dir, event.timestamp), filename)
+
+    def encode(self, event):
+        #tam goruntu ve liste/onizleme icin kucuk resim birlikte kodlanir
+        image = render_snapshot(event.frame, event.overlay)
+        img_h, img_w = image.shape[:2]
+        if self.max_width and img_w > self.max_width:
+            scale = self.max_width / img_w
+            image = cv2.resize(image, (self.max_width, int(img_h * scale)), interpolation=cv2.INTER_AREA)
+            img_h, img_w = image.shape[:2]
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return None, None
+        thumb_w = min(config.THUMBNAIL_WIDTH, img_w)
+        thumb = cv2.resize(image, (thumb_w, max(1, int(img_h * thumb_w / img_w))), interpolation=cv2.INTER_AREA)
+        ok, thumb_buffer = cv2.imencode(".jpg", thumb, [cv2.IMWRITE_JPEG_QUALITY, config.THUMBNAIL_JPEG_QUALITY])
+        return buffer, thumb_buffer if ok else None
+
+    def encode_worker(self):
+        while True:
+            item = self.job_queue.get()
+            if item is None:
+                break
+            submitted_at, event = item
+            METRICS.set_gauge("writer_queue_depth", self.job_queue.qsize())
+            try:
+                with METRICS.stage("disk_write", event.camera_id):
+                    buffer, thumb_buffer = self.encode(event)
+                    if buffer is None:
+                        raise ValueError("JPEG kodlanamadı")
+                    save_path = self.build_path(event)
+                    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+                    with open(save_path, "wb") as f:
+                        f.write(buffer.tobytes())
+                    if thumb_buffer is not None:
+                        with open(thumbnail_path(save_path), "wb") as f:
+                            f.write(thumb_buffer.tobytes())
+                #boyut kayda yazilir; disk kotasi dosyalara bakmadan hesaplanir
+                media_bytes = buffer.nbytes + (thumb_buffer.nbytes if thumb_buffer is not None else 0)
+                self.record_queue.put((submitted_at, event, save_path, media_bytes))
+            except Exception as e:
+                print(f"İhlal görüntüsü kaydedilemedi: {e}")
+                with self.stats_lock:
+                    self.events_failed += 1
+
+    def record_worker(self):
+        running = True
+        while running:
+            batch = [self.record_queue.get()]
+            while len(batch) < config.WRITER_RECORD_BATCH_SIZE:
+                try:
+                    batch.append(self.record_queue.get_nowait())
+                except Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [item for item in batch if item is not None]
+            if not batch:
+                continue
+
+            try:
+                with METRICS.stage("db_write"):
+                    self.store.add_many([(event.timestamp, event.camera_id, event.track_id, event.box, event.confidence, save_path,
+                                          event.clip_path, media_bytes)
+                                         for _, event, save_path, media_bytes in batch])
+            except Exception as e:
+                print(f"İhlal kayıtları veritabanına yazılamadı: {e}")
+                with self.stats_lock:
+                    self.events_failed += len(batch)
+                continue
+
+            for submitted_at, event, save_path, _ in batch:
+                latency = time.perf_counter() - submitted_at
+                METRICS.observe("violation_write_latency", latency, event.camera_id)
+                with self.stats_lock:
+                    self.events_written += 1
+                    self.total_write_latency += latency
+                    self.max_write_latency = max(self.max_write_latency, latency)
+                if self.on_written:
+                    self.on_written(event, save_path)
+
+    def stats(self):
+        with self.stats_lock:
+            avg_latency = self.total_write_latency / self.events_written if self.events_written else 0.0
+            return {
+                "queue_depth": self.job_queue.qsize(),
+                "submitted": self.events_submitted,
+                "written": self.events_written,
+                "dropped": self.events_dropped,
+                "failed": self.events_failed,
+                "avg_write_latency_ms": avg_latency * 1000,
+                "max_write_latency_ms": self.max_write_latency * 1000,
+            }
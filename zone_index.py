@@ -0,0 +1,102 @@
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+import config
+
+
+class CooldownZoneIndex:
+    #loglanan ihlal merkezleri icin grid tabanli indeks; suresi dolan kayitlar zaman kovalari halinde silinir
+    def __init__(self, radius=config.LOG_ZONE_RADIUS, cooldown=config.LOG_COOLDOWN_SECONDS, bucket_seconds=config.ZONE_BUCKET_SECONDS):
+        self.radius = radius
+        self.cooldown = cooldown
+        self.bucket_seconds = bucket_seconds
+        self.cells = defaultdict(list)
+        self.buckets = deque()
+
+    def __len__(self):
+        return sum(len(zones) for zones in self.cells.values())
+
+    def cell_of(self, x, y):
+        return int(x // self.radius), int(y // self.radius)
+
+    def add(self, x, y, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        cell = self.cell_of(x, y)
+        self.cells[cell].append((timestamp, float(x), float(y)))
+        self.track(cell, int(timestamp // self.bucket_seconds))
+
+    def track(self, cell, bucket_id):
+        #kovalar id sirasinda tutulur; kova sayisi cooldown / bucket_seconds kadar oldugu icin dogrusal arama yeterli
+        for index, (existing_id, cells) in enumerate(self.buckets):
+            if existing_id == bucket_id:
+                cells.add(cell)
+                return
+            if existing_id > bucket_id:
+                self.buckets.insert(index, (bucket_id, {cell}))
+                return
+        self.buckets.append((bucket_id, {cell}))
+
+    def expire(self, now=None):
+        now = time.time() if now is None else now
+        cutoff = now - self.cooldown
+        cutoff_bucket = int(cutoff // self.bucket_seconds)
+        survivors = {}
+        while self.buckets and self.buckets[0][0] <= cutoff_bucket:
+            _, cells = self.buckets.popleft()
+            for cell in cells:
+                zones = [zone for zone in self.cells.get(cell, ()) if zone[0] > cutoff]
+                if zones:
+                    self.cells[cell] = zones
+                    survivors[cell] = int(max(zone[0] for zone in zones) // self.bucket_seconds)
+                else:
+                    self.cells.pop(cell, None)
+                    survivors.pop(cell, None)
+        #silinen kovada kalan guncel bolgeler en yeni bolgelerinin kovasina yeniden baglanir; aksi halde hic silinmezlerdi
+        for cell, bucket_id in survivors.items():
+            self.track(cell, bucket_id)
+
+    def nearby_zones(self, points):
+        cells = set()
+        for x, y in points:
+            cx, cy = self.cell_of(x, y)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    if (cx + dx, cy + dy) in self.cells:
+                        cells.add((cx + dx, cy + dy))
+        zones = [zone for cell in cells for zone in self.cells[cell]]
+        return np.array(zones, dtype=np.float64).reshape(-1, 3)
+
+    def query_many(self, points, now=None):
+        #her nokta icin aktif bir cooldown bolgesinin icinde olup olmadigini dondurur
+        now = time.time() if now is None else now
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if not len(points) or not self.cells:
+            return np.zeros(len(points), dtype=bool)
+
+        zones = self.nearby_zones(points)
+        if not len(zones):
+            return np.zeros(len(points), dtype=bool)
+        active = zones[now - zones[:, 0] < self.cooldown]
+        diff = points[:, None, :] - active[None, :, 1:]
+        return ((diff ** 2).sum(axis=2) < self.radius ** 2).any(axis=1)
+
+    def admit_many(self, points, now=None):
+        #cooldown disindaki noktalari kabul edip indekse ekler; ayni karedeki yakin noktalar da birbirini bastirir
+        now = time.time() if now is None else now
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        blocked = self.query_many(points, now)
+        admitted = []
+        for i in np.flatnonzero(~blocked):
+            x, y = points[i]
+            if any((x - points[j][0]) ** 2 + (y - points[j][1]) ** 2 < self.radius ** 2 for j in admitted):
+                continue
+            admitted.append(i)
+            self.add(x, y, now)
+        return admitted
+
+    def clear(self):
+        self.cells.clear()
+        self.buckets.clear()
+